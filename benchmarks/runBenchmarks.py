@@ -0,0 +1,367 @@
+"""Headless benchmarks for the hot paths of AbstractDescriptorModel, ExtDataWidgetMapper and the star simulation.
+
+Everything runs with the offscreen Qt platform so no display is needed.  Each benchmark reports operations
+per second, latency percentiles and peak memory for every combination of its parameters:
+
+    descriptor      DescriptorModelItem get/set on models with N descriptors, dict and compact storage
+    modelData       AbstractDescriptorModel.data/setData through QModelIndex
+    modelMemory     creating 1000 models with N descriptors, dict and compact storage, with and without writing
+                    every value once.  The peak KiB column is then roughly the bytes per model
+    mapperCommit    ExtDataWidgetMapper commit path (slider -> setData) with W mapped widgets
+    mapperPopulate  model write -> dataChanged -> QDataWidgetMapper refreshing W mapped widgets
+    engineStep      Engine.step with P planets and S stars, latency is per frame
+    engineScaling   Engine.step with P planets and S stars on 1, 2, 4 ... cpu count worker threads, followed
+                    by a table of the speedups over one worker and the crossover planet count per star count
+    updatePlanets   MainGui.updatePlanets with P planets (needs pyqtgraph), latency is per frame
+
+python benchmarks/runBenchmarks.py                          # quick parameter grid
+python benchmarks/runBenchmarks.py --full                   # planets up to 1e6, more stars and widgets
+python benchmarks/runBenchmarks.py --only engineStep        # a subset, may be repeated
+python benchmarks/runBenchmarks.py --save baseline.json     # store results as a baseline
+python benchmarks/runBenchmarks.py --baseline baseline.json --threshold 0.2
+
+With --baseline every result is compared with the stored one and flagged as a regression when its ops/sec
+dropped or its median latency grew by more than the threshold (20% by default).  The exit status is 1 when
+anything regressed so the script can gate a CI job.  Baselines are machine specific, so store one per machine.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(here, '..', 'lib'))
+sys.path.append(os.path.join(here, '..', 'starSimulation'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QT_API', 'pyqt5')
+os.environ.setdefault('PYQTGRAPH_QT_LIB', 'PyQt5')
+
+from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QApplication, QSlider
+import numpy as np
+from AbstractDescriptorModel import AbstractDescriptorModel, DescriptorModelItem
+from ExtDataWidgetMapper import ExtDataWidgetMapper
+
+
+QUICK = {
+    'descriptors': [4, 64],
+    'widgets': [1, 16],
+    'planets': [100, 10000],
+    'stars': [1, 10],
+}
+FULL = {
+    'descriptors': [4, 32, 256],
+    'widgets': [1, 8, 64],
+    'planets': [100, 10000, 100000, 1000000],
+    'stars': [1, 10, 100],
+}
+
+
+def measure(run, batches, batchSize, memoryBatches=1):
+    """Call run() batches times, each call performing batchSize operations.  Returns ops/sec, per operation
+    latency percentiles and the peak traced memory of a separate, shorter pass (tracing slows things down)"""
+    run()   # warm up
+    gc.collect()
+    gc.disable()
+    try:
+        durations = []
+        for _ in range(batches):
+            start = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        for _ in range(memoryBatches):
+            run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    perOp = np.array(durations) / batchSize
+    return {
+        'opsPerSec': batchSize * batches / sum(durations),
+        'latencyUs': {f'p{p}': float(np.percentile(perOp, p)) * 1e6 for p in (50, 90, 99)},
+        'peakMemKb': peak / 1024,
+    }
+
+
+def makeModelClass(n, compact):
+    namespace = {f'v{i}': DescriptorModelItem(0) for i in range(n)}
+    namespace['compactStorage'] = compact
+    return type(f'Bench{n}Model', (AbstractDescriptorModel,), namespace)
+
+
+def benchDescriptor(grid):
+    for n in grid['descriptors']:
+        for compact in (False, True):
+            model = makeModelClass(n, compact)()
+            names = [f'v{i}' for i in range(n)]
+            counter = [0]
+
+            def get():
+                for name in names:
+                    getattr(model, name)
+
+            def setValues():
+                counter[0] += 1
+                value = counter[0]
+                for name in names:
+                    setattr(model, name, value)
+
+            params = {'descriptors': n, 'compact': compact}
+            yield 'descriptorGet', params, measure(get, 200, n)
+            yield 'descriptorSet', params, measure(setValues, 200, n)
+
+
+def benchModelData(grid):
+    for n in grid['descriptors']:
+        model = makeModelClass(n, True)()
+        indexes = [model.index(i) for i in range(n)]
+        counter = [0]
+
+        def data():
+            for index in indexes:
+                model.data(index, Qt.DisplayRole)
+
+        def setData():
+            counter[0] += 1
+            for index in indexes:
+                model.setData(index, counter[0], Qt.EditRole)
+
+        yield 'modelData', {'descriptors': n}, measure(data, 200, n)
+        yield 'modelSetData', {'descriptors': n}, measure(setData, 200, n)
+
+
+def benchModelMemory(grid):
+    for n in grid['descriptors']:
+        for compact in (False, True):
+            cls = makeModelClass(n, compact)
+            names = [f'v{i}' for i in range(n)]
+            for written in (False, True):
+
+                def create():
+                    models = [cls() for _ in range(1000)]
+                    if written:
+                        for model in models:
+                            for name in names:
+                                setattr(model, name, 1)
+                    return models
+
+                params = {'descriptors': n, 'compact': compact, 'written': written}
+                yield 'modelMemory', params, measure(create, 5, 1000)
+
+
+def mappedSliders(n):
+    model = makeModelClass(n, True)()
+    mapper = ExtDataWidgetMapper()
+    mapper.setOrientation(Qt.Vertical)
+    mapper.setModel(model)
+    sliders = []
+    for i in range(n):
+        slider = QSlider(Qt.Horizontal)
+        slider.setRange(0, 1000000)
+        mapper.addMapping(slider, i)
+        sliders.append(slider)
+    mapper.toFirst()
+    return model, mapper, sliders
+
+
+def benchMapperCommit(grid):
+    for n in grid['widgets']:
+        model, mapper, sliders = mappedSliders(n)
+        counter = [0]
+
+        def commit():
+            counter[0] = (counter[0] + 1) % 1000000
+            for slider in sliders:
+                slider.setValue(counter[0])
+
+        yield 'mapperCommit', {'widgets': n}, measure(commit, 100, n)
+
+
+def benchMapperPopulate(grid):
+    for n in grid['widgets']:
+        model, mapper, sliders = mappedSliders(n)
+        counter = [0]
+
+        def populate():
+            counter[0] = (counter[0] + 1) % 1000000
+            model.v0 = counter[0]
+
+        yield 'mapperPopulate', {'widgets': n}, measure(populate, 200, 1)
+
+
+def makeEngine(planets, stars, workers=1):
+    from models import ControlModel
+    from starSimulation import Engine
+    controlModel = ControlModel()
+    controlModel.numPlanets = planets
+    engine = Engine(controlModel, workers=workers)
+    rng = np.random.default_rng(0)
+    for _ in range(stars):
+        engine.addStar().setMany(x=rng.uniform(-100, 100), y=rng.uniform(-100, 100))
+    engine.resetPlanets(0, 0)
+    return engine
+
+
+def frames(planets):
+    # keep the big configurations from taking forever
+    return max(5, min(200, int(2e7 / planets)))
+
+
+def benchEngineStep(grid):
+    for planets in grid['planets']:
+        for stars in grid['stars']:
+            engine = makeEngine(planets, stars)
+            yield 'engineStep', {'planets': planets, 'stars': stars}, measure(lambda: engine.step(0.005),
+                                                                              frames(planets * stars), 1)
+
+
+def workerCounts():
+    # powers of two up to the number of cores, and always at least two counts to compare
+    counts = [1, 2]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    if (os.cpu_count() or 1) not in counts:
+        counts.append(os.cpu_count())
+    return counts
+
+
+def benchEngineScaling(grid):
+    for planets in grid['planets']:
+        for stars in grid['stars']:
+            for workers in workerCounts():
+                engine = makeEngine(planets, stars, workers)
+                result = measure(lambda: engine.step(0.005), frames(planets * stars), 1)
+                result['parts'] = engine.planets.parallelParts(stars)   # 1 when the scene is too small to split
+                yield 'engineScaling', {'planets': planets, 'stars': stars, 'workers': workers}, result
+                engine.planets.setWorkers(1)     # shuts the pool down
+
+
+def scalingReport(results):
+    """Print the speedup of every engineScaling result over its one worker run and, per star count, the
+    smallest planet count at which more workers pay off.  Runs too small for PlanetState to split across the
+    pool ran serially whatever the worker count, so they are shown as 'serial' and never count as a crossover"""
+    runs = {}
+    for key, result in results.items():
+        if key.startswith('engineScaling['):
+            params = dict(item.split('=') for item in key[len('engineScaling['):-1].split(','))
+            runs.setdefault((int(params['stars']), int(params['planets'])), {})[int(params['workers'])] = result
+    if not runs:
+        return
+    counts = sorted({workers for byWorkers in runs.values() for workers in byWorkers})
+    print(f'\nscaling on {os.cpu_count()} cores, speedup over 1 worker')
+    print(f'{"stars":>8}{"planets":>10}' + ''.join(f'{f"{w} workers":>12}' for w in counts))
+    crossovers = {}
+    for (stars, planets), byWorkers in sorted(runs.items()):
+        serial = byWorkers[1]['opsPerSec']
+        speedups = {w: byWorkers[w]['opsPerSec'] / serial for w in byWorkers
+                    if w == 1 or byWorkers[w].get('parts', w) > 1}
+        print(f'{stars:>8}{planets:>10}' + ''.join(f'{speedups[w]:>12.2f}' if w in speedups else
+                                                   f'{"serial" if w in byWorkers else "":>12}' for w in counts))
+        if stars not in crossovers and max(speedups.values()) > 1.1:
+            crossovers[stars] = planets
+    for stars in sorted({stars for stars, planets in runs}):
+        crossover = crossovers.get(stars)
+        print(f'{stars} stars: ' + (f'threads pay off from {crossover} planets' if crossover else
+                                    'threads never paid off in this grid'))
+
+
+def benchUpdatePlanets(grid):
+    try:
+        from gui import MainGui
+    except ImportError as e:
+        print(f'skipping updatePlanets: {e}', file=sys.stderr)
+        return
+    for planets in grid['planets']:
+        for rainbow in (False, True):
+            engine = makeEngine(planets, 1)
+            gui = MainGui(engine, engine.controlModel)
+            engine.resetPlanets(0, 0)
+            engine.controlModel.rainbow = rainbow
+            yield 'updatePlanets', {'planets': planets, 'rainbow': rainbow}, measure(gui.updatePlanets,
+                                                                                     frames(planets), 1)
+
+
+BENCHMARKS = {
+    'descriptor': benchDescriptor,
+    'modelData': benchModelData,
+    'modelMemory': benchModelMemory,
+    'mapperCommit': benchMapperCommit,
+    'mapperPopulate': benchMapperPopulate,
+    'engineStep': benchEngineStep,
+    'engineScaling': benchEngineScaling,
+    'updatePlanets': benchUpdatePlanets,
+}
+
+
+def resultKey(name, params):
+    return name + '[' + ','.join(f'{k}={v}' for k, v in sorted(params.items())) + ']'
+
+
+def compare(results, baseline, threshold):
+    """Return the keys of results which are slower than baseline by more than threshold"""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        slower = result['opsPerSec'] < old['opsPerSec'] * (1 - threshold)
+        laggier = result['latencyUs']['p50'] > old['latencyUs']['p50'] * (1 + threshold)
+        if slower or laggier:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmarks for AbstractDescriptorModel and the star simulation')
+    parser.add_argument('--full', action='store_true', help='run the full parameter grid')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('--save', metavar='FILE', help='write results to FILE as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='compare results with a JSON file written by --save')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown (default 0.2)')
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    grid = FULL if args.full else QUICK
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    print(f'{"benchmark":<60}{"ops/sec":>14}{"p50 us":>12}{"p90 us":>12}{"p99 us":>12}{"peak KiB":>12}')
+    for name in args.only or BENCHMARKS:
+        for benchName, params, result in BENCHMARKS[name](grid):
+            key = resultKey(benchName, params)
+            results[key] = result
+            latency = result['latencyUs']
+            flag = ''
+            if key in baseline:
+                flag = f'  ({result["opsPerSec"] / baseline[key]["opsPerSec"] - 1:+.0%} vs baseline)'
+            print(f'{key:<60}{result["opsPerSec"]:>14.1f}{latency["p50"]:>12.2f}{latency["p90"]:>12.2f}'
+                  f'{latency["p99"]:>12.2f}{result["peakMemKb"]:>12.1f}{flag}')
+            app.processEvents()
+
+    scalingReport(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version, 'numpy': np.__version__, 'results': results}, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:')
+        for key in regressions:
+            print(f'    {key}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Headless checks of properties of the star simulation and its models which the benchmarks rely on but don't
+verify:
+
+    workerIdentity  PlanetState.step gives bit for bit the same planets for any number of worker threads, for
+                    every integrator, with and without adaptive substeps
+    tripleBuffer    a reader racing a writer on background.TripleBuffer only ever sees whole frames, in order
+    tableWrites     DescriptorTableModel.setColumn converts, clamps and refuses values exactly like setValue
+
+python benchmarks/runChecks.py                  # run all checks
+python benchmarks/runChecks.py --only workerIdentity
+
+Every check prints one line per case and the exit status is 1 when any case failed.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(here, '..', 'lib'))
+sys.path.append(os.path.join(here, '..', 'starSimulation'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QT_API', 'pyqt5')
+
+import numpy as np
+from physics import PlanetState, AdaptiveStep, INTEGRATORS, kernelChunk
+from background import TripleBuffer
+from AbstractDescriptorModel import AbstractDescriptorModel, DescriptorModelItem, DerivedModelItem
+from DescriptorTableModel import DescriptorTableModel
+from TypedModelItems import IntItem, FloatItem, BoolItem, ArrayItem
+
+
+def steppedState(planets, sx, sy, integrator, adaptive, workers, steps=20):
+    state = PlanetState(0, np.float64, workers, INTEGRATORS[integrator]())
+    state.setAdaptive(AdaptiveStep() if adaptive else None)
+    state.reset(planets, 3.0, -2.0, 50, np.random.default_rng(0))
+    state.velocities[:] = np.random.default_rng(1).normal(size=state.velocities.shape)
+    for _ in range(steps):
+        state.step(0.005, sx, sy, 0.01, 1.5)
+    parts = state.parallelParts(len(sx))
+    state.setWorkers(1)     # shuts the pool down
+    return state.buffer, parts
+
+
+def checkWorkerIdentity():
+    rng = np.random.default_rng(2)
+    for stars in (1, 10):
+        sx, sy = rng.uniform(-100, 100, (2, stars))
+        # enough planets for four workers to get work, plus a ragged last chunk
+        planets = kernelChunk(stars) * PlanetState.minChunksPerWorker * 4 + 7
+        for integrator in INTEGRATORS:
+            for adaptive in (False, True):
+                serial, _ = steppedState(planets, sx, sy, integrator, adaptive, 1)
+                for workers in (2, 3, 4):
+                    threaded, parts = steppedState(planets, sx, sy, integrator, adaptive, workers)
+                    ok = parts > 1 and np.array_equal(serial, threaded)
+                    yield ok, (f'stars={stars} planets={planets} integrator={integrator} adaptive={adaptive} '
+                               f'workers={workers} parts={parts}')
+
+
+def checkTripleBuffer(seconds=1.0):
+    # the writer fills every frame with its frame number, so a torn frame holds more than one value.  Frames
+    # switch between two sizes now and then so that slots also get reallocated under the reader
+    for planets in (1000, 200000):
+        buffer = TripleBuffer()
+        stop = threading.Event()
+
+        def write():
+            frame = 0
+            while not stop.is_set():
+                frame += 1
+                n = planets if frame % 50 else planets // 2
+                buffer.publish(np.full((2, n), float(frame)))
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        reads = torn = backwards = 0
+        last = 0.0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            positions = buffer.read()
+            if positions.size:
+                first = positions[0, 0]
+                torn += not (positions == first).all()
+                backwards += first < last
+                last = first
+                reads += 1
+        stop.set()
+        writer.join()
+        yield torn == 0 and backwards == 0 and reads > 0, (f'planets={planets} published={buffer.frames} '
+                                                           f'reads={reads} torn={torn} backwards={backwards}')
+
+
+class TableSchema(AbstractDescriptorModel):
+    count = IntItem(0, minimum=0, maximum=10)
+    gain = FloatItem(1.0, maximum=2.0)
+    enabled = BoolItem(False)
+    weight = DescriptorModelItem(0.0)       # untyped float, float64 column
+    label = DescriptorModelItem('')         # untyped, object column
+
+
+def checkTableWrites():
+    # every case writes the same values once through setColumn and once cell by cell through setValue. Both
+    # must store the same thing or both must refuse with the same kind of error, leaving the column as it was
+    cases = [
+        ('count', [99.7, -3, 4.4, True]),
+        ('count', np.array([2.5, 3.5, 1e9])),
+        ('count', ['1', 2]),
+        ('count', [float('nan'), 1]),
+        ('gain', np.array([1, 5, -10 ** 12], dtype=np.int64)),
+        ('gain', [0.5, 'abc']),
+        ('enabled', [1, 0, True, np.int8(3)]),
+        ('enabled', [0.5, 1]),
+        ('weight', [1, 2.5, np.float32(0.1), True]),
+        ('weight', [2 ** 53 + 1, 0]),
+        ('weight', ['abc', 1.0]),
+        ('label', ['abc', 5, 2.5, None]),
+    ]
+    for name, values in cases:
+        section = TableSchema._nameSections[name]
+        bulk, cells = (DescriptorTableModel(TableSchema) for _ in range(2))
+        for table in (bulk, cells):
+            for _ in values:
+                table.appendRow()
+        before = bulk.column(name).copy()
+        try:
+            bulk.setColumn(name, values)
+            bulkError = None
+        except (TypeError, ValueError) as error:
+            bulkError = type(error)
+        try:
+            for row, value in enumerate(values.tolist() if isinstance(values, np.ndarray) else values):
+                cells.setValue(row, section, value)
+            cellError = None
+        except (TypeError, ValueError) as error:
+            cellError = type(error)
+        stored = [bulk.value(row, section) for row in range(len(bulk))]
+        if cellError is None:
+            expected = [cells.value(row, section) for row in range(len(cells))]
+            ok = bulkError is None and [(type(v), v) for v in stored] == [(type(v), v) for v in expected]
+        else:
+            ok = bulkError is cellError and np.array_equal(bulk.column(name), before)
+            expected = cellError.__name__
+        yield ok, f'{name} <- {values!r}: stored {stored if bulkError is None else bulkError.__name__}, ' \
+                  f'expected {expected}'
+
+    for item in (ArrayItem(np.float32, (None,)), DerivedModelItem(lambda model: model.x, ['x'])):
+        schema = type('BadSchema', (AbstractDescriptorModel,), {'x': FloatItem(), 'bad': item})
+        try:
+            DescriptorTableModel(schema)
+            ok = False
+        except TypeError:
+            ok = True
+        yield ok, f'{type(item).__name__} in the schema is refused with a TypeError'
+
+
+CHECKS = {
+    'workerIdentity': checkWorkerIdentity,
+    'tripleBuffer': checkTripleBuffer,
+    'tableWrites': checkTableWrites,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless checks of the star simulation')
+    parser.add_argument('--only', action='append', choices=sorted(CHECKS), help='checks to run')
+    args = parser.parse_args()
+
+    failures = 0
+    for name in args.only or CHECKS:
+        for ok, description in CHECKS[name]():
+            failures += not ok
+            print(f'{"ok" if ok else "FAILED":<8}{name:<18}{description}')
+    print(f'\n{failures} failure(s)' if failures else '\nall checks passed')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
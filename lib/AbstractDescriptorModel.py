@@ -1,5 +1,14 @@
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from numbers import Real
+from time import perf_counter
+from types import MappingProxyType
+import threading
+import weakref
 from qtpy.QtCore import QAbstractListModel
-from qtpy.QtCore import Qt
+from qtpy.QtCore import Qt, Signal, QTimer
+import numpy as np
+from ChangeJournal import ChangeJournal
 
 
 class AbstractDescriptorModel(QAbstractListModel):
@@ -32,40 +41,535 @@ class AbstractDescriptorModel(QAbstractListModel):
     w2 = QSpinBox()
     mapper.addMapping(w1, ExampleModel.var1.section)    # map widget w1 to model.var1
     mapper.addMapping(w2, ExampleModel.var2.section)    # map widget w2 to model.var2
+
+    Setting several attributes at once can be batched so that views are only notified once.  Either
+    use the batch context (which may be nested) or setMany:
+
+    with model.batch():
+        model.var1 = 1
+        model.var2 = 2
+
+    model.setMany(var1=1, var2=2)     # equivalent to the above
+
+    Writing a value which is equal to the current one does not notify views at all.  The number of
+    notifications skipped this way is available as model.suppressedNotifications
+
+    The section layout is worked out once per class when the class is created.  Sections of a base
+    class keep their numbers in every derived class and new descriptors are appended after them.
+
+    Derived classes may set the class attribute compactStorage = True.  Values are then kept in a single
+    list indexed by section instead of one private attribute per descriptor.  Until its first write a compact
+    model shares the class's tuple of initial values, after that its values take one pointer per section
+    rather than an instance __dict__ entry per attribute.  This only pays off for models with many written
+    descriptors: with 64 of them a model takes about 1.2 KB instead of 2.0 KB (see the modelMemory
+    benchmark).  With a handful of descriptors both modes use the same memory within a few bytes and reads
+    and writes cost the same within measurement noise, so there is no reason to switch small models.
+    Instances still have a __dict__ for everything else since sip gives every wrapped Qt object one.
+
+    Code which only cares about one value can subscribe to its section rather than filtering dataChanged:
+
+    model.subscribe('var1', callback)     # callback(value) runs only when var1 changes
+
+    Models are written from the thread which created them unless setThreadSafe(True) has been called.  In
+    thread safe mode writes from other threads are stored under a lock and the sections they touch are
+    handed to the owner thread as a single queued notification, no matter how many writes happen before
+    the owner's event loop gets to it.
+
+    Models which are written much faster than anybody can watch can be throttled with setMaxNotifyRate(hz).
+    Reading an attribute always returns the latest value but views are then notified at most hz times a
+    second with everything that changed in between.  Call flush() to notify views right away.
+
+    Values computed from other attributes can be declared with DerivedModelItem.  They get a section of their
+    own like any other attribute but are read only and only recomputed when one of their dependencies changed:
+
+    class ExampleModel(AbstractDescriptorModel):
+        var1 = DescriptorModelItem(1)
+        var2 = DescriptorModelItem(2)
+        total = DerivedModelItem(lambda model: model.var1 + model.var2, depends_on=['var1', 'var2'])
+
+    After enableJournal() every change made through attributes or setData is recorded so that it can be
+    taken back with undo() and redo().  See ChangeJournal
+
+    Traffic through a model (reads, writes, notifications and the time spent in the slots they trigger) can be
+    counted by attaching it to a ModelInstrumentation.Instrumentation.  Detached models only pay for a None
+    check on each access.
     """
 
+    compactStorage = False
+
+    # per-instance state which most models never change.  These class level defaults are shadowed by an
+    # instance attribute on first write, which keeps the __dict__ of a typical model small
+    _values = None                  # compactStorage: the class's _defaults until the first write, then a list
+    _batchDepth = 0
+    suppressedNotifications = 0
+    _lock = None
+    _threadWritesPending = False
+    _notifyTimer = None
+    _journal = None
+    _stats = None
+    _derivedGeneration = 0          # counts invalidations of derived values.  See DerivedModelItem.__get__
+
+    # True while none of the optional features (batching, journal, thread safe mode, instrumentation,
+    # throttling, subscriptions, derived values) is in use, so that DescriptorModelItem.__set__ can write and
+    # emit right away after a single check.  Kept up to date by _updateFastWrites
+    _fastWrites = True
+
+    # used to hand sections written by other threads over to the owner thread.  See setThreadSafe()
+    _sigThreadWrites = Signal()
+
+    # class level section tables.  These are filled in by __init_subclass__ and shared by all instances
+    _sectionNames = ()                      # section -> public name
+    _nameSections = MappingProxyType({})    # public name -> section
+    _descriptors = ()                       # section -> DescriptorModelItem
+    _defaults = ()                          # section -> initial value, used by compactStorage
+    _derivedSections = frozenset()          # sections of DerivedModelItems
+    _directData = ()                        # section -> True if data() may read compact storage directly
+    _dependents = MappingProxyType({})      # section -> sections of all DerivedModelItems depending on it
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # loop over the mro classes base first and find any DescriptorModelItems.  Then assign a 'section'
+        # id to each one.  A descriptor which overrides one of a base class reuses the base's section
+        mro = cls.mro()
+        nameSections = {}
+        descriptors = {}
+        for klass in reversed(mro[:mro.index(AbstractDescriptorModel)]):
+            for attr, desc in klass.__dict__.items():
+                if isinstance(desc, DescriptorModelItem):
+                    section = nameSections.setdefault(desc.public_name, len(nameSections))
+                    if desc.section is None:
+                        desc.section = section
+                    elif desc.section != section:
+                        raise TypeError(f'{cls.__name__}: {desc.public_name!r} would need section {section} but '
+                                        f'is already section {desc.section} in {klass.__name__}')
+                    descriptors[section] = desc
+
+        cls._sectionNames = tuple(nameSections)
+        cls._nameSections = MappingProxyType(nameSections)
+        cls._descriptors = tuple(descriptors[section] for section in range(len(descriptors)))
+        cls._defaults = tuple(_DERIVED if isinstance(desc, DerivedModelItem) else desc._initialVal
+                              for desc in cls._descriptors)
+        cls._values = cls._defaults if cls.compactStorage else None
+        cls._directData = tuple(not isinstance(desc, DerivedModelItem) and
+                                type(desc).dataValue is DescriptorModelItem.dataValue for desc in cls._descriptors)
+
+        # work out which derived sections have to be invalidated when a section changes.  Derived values may
+        # depend on other derived values so follow the dependencies all the way through
+        derived = [desc for desc in cls._descriptors if isinstance(desc, DerivedModelItem)]
+        direct = {}
+        for desc in derived:
+            for name in desc.dependsOn:
+                if name not in nameSections:
+                    raise TypeError(f'{cls.__name__}: {desc.public_name!r} depends on unknown attribute {name!r}')
+                direct.setdefault(nameSections[name], set()).add(desc.section)
+        dependents = {}
+        for section in direct:
+            found, todo = set(), list(direct[section])
+            while todo:
+                dependent = todo.pop()
+                if dependent not in found:
+                    found.add(dependent)
+                    todo.extend(direct.get(dependent, ()))
+            dependents[section] = tuple(sorted(found))
+        cls._derivedSections = frozenset(desc.section for desc in derived)
+        cls._dependents = MappingProxyType(dependents)
+        cls._fastWrites = not dependents
+
     def __init__(self):
         super().__init__()
 
-        # loop over all of the mro classes and find any DescriptorModelItems.
-        # Then assign a 'section' id to each one and create a map of 'section' to public_name
-        self._itemNames = {}
-        section = 0
-        for cls in type(self).mro():
-            if cls is AbstractDescriptorModel:
-                break   # don't need to dig into QAbstractListModel
-            for attr, desc in cls.__dict__.items():
-                if isinstance(desc, DescriptorModelItem):
-                    desc.section = section
-                    self._itemNames[desc.section] = desc.public_name
-                    section += 1
+        # dirty sections of the current batch.  See batch()
+        self._dirtySections = set()
+
+        # section -> list of references to subscribed callbacks.  See subscribe()
+        self._subscribers = {}
+
+        # thread safe mode bookkeeping.  _lock and the set of sections written by other threads are only made by
+        # setThreadSafe(True)
+        self._ownerThread = threading.get_ident()
+
+        # DerivedModelItem bookkeeping, only for classes which have any.  Cached values, values from before the
+        # last invalidation and the derived sections which are being watched (read through data() or
+        # subscribed to).  See also _derivedGeneration
+        if self._derivedSections:
+            self._derivedValues = {}
+            self._derivedPrevious = {}
+            self._observedDerived = set()
+
+        # the throttling timer (setMaxNotifyRate), the undo journal (enableJournal) and traffic counters
+        # (ModelInstrumentation) stay at their None class defaults until they are used
 
     def flags(self, index):
+        if index.row() in self._derivedSections:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
         return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
 
     def rowCount(self, parent):
-        return len(self._itemNames)
+        return len(self._sectionNames)
 
     def data(self, index, role):
         if role in [Qt.DisplayRole, Qt.EditRole]:
-            return getattr(self, self._itemNames[index.row()])
+            row = index.row()
+            if self._stats is not None:
+                self._stats.dataCalls[row] += 1
+            if self._values is not None and self._directData[row]:
+                return self._values[row]
+            if row in self._derivedSections:
+                self._observedDerived.add(row)   # a view is watching so keep it up to date from now on
+            return self._descriptors[row].dataValue(self)
         else:
             return None
 
     def setData(self, index, value, role):
-        setattr(self, self._itemNames[index.row()], value)
+        row = index.row()
+        if row in self._derivedSections:
+            return False
+        # go straight to the descriptor rather than looking it up by name.  Typed items reject values they
+        # can't convert, in which case the view keeps its old value.  Only the conversion is guarded, errors
+        # raised by slots or subscribers reacting to the write are not a refused value
+        desc = self._descriptors[row]
+        if desc.coerce is not None:
+            try:
+                value = desc.coerce(value)
+            except (TypeError, ValueError):
+                return False
+        stats = self._stats
+        if stats is None:
+            desc._assign(self, value)
+            return True
+        stats.setDataCalls[row] += 1
+        stats.sets[row] += 1
+        start = perf_counter()
+        try:
+            desc._assign(self, value)
+        finally:
+            stats.timeSlot('setData', perf_counter() - start)
+        return True
+
+    @contextmanager
+    def batch(self):
+        """Context manager which defers dataChanged until the outermost batch exits.  All sections
+        written during the batch are then announced with one dataChanged per contiguous run of rows"""
+        if self._lock is not None and threading.get_ident() != self._ownerThread:
+            yield self   # writes from other threads are already coalesced by the owner thread
+            return
+        self._batchDepth += 1
+        self._fastWrites = False
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            if self._batchDepth == 0:
+                self._updateFastWrites()
+                if self._dirtySections:
+                    self._scheduleEmit()
+
+    def setMany(self, **values):
+        """Set several descriptor values by name and notify views once"""
+        with self.batch():
+            for name, val in values.items():
+                if not isinstance(getattr(type(self), name, None), DescriptorModelItem):
+                    raise AttributeError(f'{type(self).__name__} has no DescriptorModelItem named {name!r}')
+                setattr(self, name, val)
+
+    def snapshot(self):
+        """Return the current values as a tuple indexed by section.  Arrays are copied so the snapshot doesn't
+        change along with the model.  Derived sections hold None since they are recomputed anyway"""
+        return tuple(None if section in self._derivedSections else desc.snapshotValue(self)
+                     for section, desc in enumerate(self._descriptors))
+
+    def restore(self, snapshot):
+        """Put back the values from snapshot(), notifying views once for everything which changed.  With the
+        journal enabled a single undo() takes the whole restore back"""
+        if len(snapshot) != len(self._descriptors):
+            raise ValueError(f'snapshot has {len(snapshot)} values but {type(self).__name__} has '
+                             f'{len(self._descriptors)} sections')
+        journal = self._journal
+        with self.batch(), (journal.group() if journal is not None else nullcontext()):
+            for section, (desc, value) in enumerate(zip(self._descriptors, snapshot)):
+                if section not in self._derivedSections:
+                    desc.__set__(self, value)
+
+    def enableJournal(self, maxEntries=1000, mergeInterval=0.5):
+        """Start recording changes for undo() and redo().  At most maxEntries changes are kept and changes to
+        the same section less than mergeInterval seconds apart are merged.  ArrayModelItems are not recorded"""
+        self._journal = ChangeJournal(maxEntries, mergeInterval)
+        self._updateFastWrites()
+
+    def disableJournal(self):
+        self._journal = None
+        self._updateFastWrites()
+
+    def undo(self, count=1):
+        """Take back the last count changes, notifying views once.  Returns False if there was nothing to undo"""
+        return self._replay(self._journal.popUndo(count) if self._journal is not None else [])
+
+    def redo(self, count=1):
+        """Apply the last count undone changes again, notifying views once"""
+        return self._replay(self._journal.popRedo(count) if self._journal is not None else [])
+
+    def _replay(self, changes):
+        if not changes:
+            return False
+        self._journal._replaying = True
+        try:
+            with self.batch():
+                for section, value in changes:
+                    self._descriptors[section].__set__(self, value)
+        finally:
+            self._journal._replaying = False
         return True
 
+    def subscribe(self, section, callback):
+        """Call callback(value) after the value of section changes.  section may be given as a section number
+        or as the descriptor name.  Bound methods are only weakly referenced so subscribing doesn't keep the
+        subscriber alive"""
+        section = self._sectionOf(section)
+        if section in self._derivedSections:
+            self._observedDerived.add(section)
+        self._subscribers.setdefault(section, []).append(callbackRef(callback))
+        self._fastWrites = False
+
+    def unsubscribe(self, section, callback):
+        section = self._sectionOf(section)
+        refs = self._subscribers.get(section, [])
+        refs[:] = [ref for ref in refs if ref() not in (None, callback)]
+        if not refs:
+            self._subscribers.pop(section, None)
+            self._updateFastWrites()
+
+    def setThreadSafe(self, threadSafe=True):
+        """Allow (or stop allowing) writes from threads other than the one which created the model"""
+        if threadSafe and self._lock is None:
+            self._threadDirtySections = set()
+            self._lock = threading.Lock()
+            self._fastWrites = False
+            self._sigThreadWrites.connect(self._flushThreadWrites, Qt.QueuedConnection)
+        elif not threadSafe and self._lock is not None:
+            self._sigThreadWrites.disconnect(self._flushThreadWrites)
+            self._flushThreadWrites()
+            self._lock = None
+            del self._threadDirtySections
+            self._updateFastWrites()
+
+    def setMaxNotifyRate(self, hz):
+        """Notify views at most hz times per second.  Passing None or 0 goes back to notifying on every write"""
+        if hz:
+            if self._notifyTimer is None:
+                self._notifyTimer = QTimer(self)
+                self._notifyTimer.setSingleShot(True)
+                self._notifyTimer.timeout.connect(self._onNotifyTimer)
+            self._notifyTimer.setInterval(max(1, round(1000 / hz)))
+            self._fastWrites = False
+        elif self._notifyTimer is not None:
+            self._notifyTimer.stop()
+            self._notifyTimer.deleteLater()
+            self._notifyTimer = None
+            self._updateFastWrites()
+            self.flush()
+
+    def flush(self):
+        """Deliver any notifications which are being held back by throttling or by writes from other threads"""
+        if self._lock is not None:
+            with self._lock:
+                self._dirtySections.update(self._threadDirtySections)
+                self._threadDirtySections = set()
+                self._threadWritesPending = False
+        if self._dirtySections and not self._batchDepth:
+            self._emitSections()
+
+    def _scheduleEmit(self):
+        # the first change after a quiet interval goes out right away, anything after that waits for the timer
+        timer = self._notifyTimer
+        if timer is None:
+            self._emitSections()
+        elif not timer.isActive():
+            self._emitSections()
+            timer.start()
+
+    def _onNotifyTimer(self):
+        if self._dirtySections and not self._batchDepth:
+            self._emitSections()
+            self._notifyTimer.start()
+
+    def _flushThreadWrites(self):
+        # runs on the owner thread.  Only the section numbers are handed over, views then read the latest values
+        with self._lock:
+            sections = self._threadDirtySections
+            self._threadDirtySections = set()
+            self._threadWritesPending = False
+        if sections:
+            with self.batch():
+                self._dirtySections.update(sections)
+
+    def _updateFastWrites(self):
+        # called whenever one of the optional features is switched off again
+        self._fastWrites = (not self._batchDepth and self._journal is None and self._lock is None and
+                            self._stats is None and self._notifyTimer is None and not self._subscribers and
+                            not self._dependents)
+
+    def _sectionOf(self, section):
+        return self._nameSections[section] if isinstance(section, str) else section
+
+    def _notifySection(self, section):
+        """Called by DescriptorModelItem whenever the value for section has been written"""
+        dependents = self._dependents.get(section)
+        if dependents:
+            # derived values are invalidated straight away so that reads are never stale.  Whether their views
+            # need to hear about it is only decided when the notification goes out.  See _emitSections
+            if self._lock is None:
+                self._invalidateDerived(dependents)
+            else:
+                with self._lock:
+                    self._invalidateDerived(dependents)
+
+        if self._lock is not None and threading.get_ident() != self._ownerThread:
+            with self._lock:
+                self._threadDirtySections.add(section)
+                if dependents:
+                    self._threadDirtySections.update(dependents)
+                if self._threadWritesPending:
+                    return
+                self._threadWritesPending = True
+            self._sigThreadWrites.emit()    # queued, so this is delivered on the owner thread
+            return
+
+        if self._batchDepth or self._notifyTimer is not None or dependents:
+            self._dirtySections.add(section)
+            if dependents:
+                self._dirtySections.update(dependents)
+            if not self._batchDepth:
+                self._scheduleEmit()
+        elif self._stats is not None:
+            self._emitRange(section, section)
+            if section in self._subscribers:
+                self._dispatch(section)
+        else:
+            index = self.createIndex(section, 0, None)
+            self.dataChanged.emit(index, index)
+            if section in self._subscribers:
+                self._dispatch(section)
+
+    def _invalidateDerived(self, sections):
+        self._derivedGeneration += 1
+        for section in sections:
+            if section in self._derivedValues:
+                value = self._derivedValues.pop(section)
+                if section in self._observedDerived:
+                    self._derivedPrevious.setdefault(section, value)
+
+    def _derivedChanged(self, section):
+        # only watched derived values are recomputed, and they only count as changed if the value differs
+        if section not in self._observedDerived:
+            return False
+        desc = self._descriptors[section]
+        previous = self._derivedPrevious.pop(section, _DERIVED)
+        return previous is _DERIVED or not desc.equals(previous, desc.__get__(self))
+
+    def _dispatch(self, section):
+        # call the subscribers of one section with its current value, dropping any which have been collected
+        value = self._descriptors[section].__get__(self)
+        refs = self._subscribers[section]
+        stats = self._stats
+        for ref in list(refs):
+            callback = ref()
+            if callback is None:
+                refs.remove(ref)
+            elif stats is None:
+                callback(value)
+            else:
+                start = perf_counter()
+                callback(value)
+                stats.timeSlot(getattr(callback, '__qualname__', repr(callback)), perf_counter() - start)
+        if not refs:
+            self._subscribers.pop(section, None)
+            self._updateFastWrites()
+
+    def _emitRange(self, first, last):
+        stats = self._stats
+        if stats is None:
+            self.dataChanged.emit(self.createIndex(first, 0, None), self.createIndex(last, 0, None))
+        else:
+            # slots connected directly to dataChanged run inside emit, so this times all of them together
+            start = perf_counter()
+            self.dataChanged.emit(self.createIndex(first, 0, None), self.createIndex(last, 0, None))
+            stats.emitted(first, last, perf_counter() - start)
+
+    def _emitSections(self):
+        # take ownership of the dirty set first since slots connected to dataChanged may write again
+        sections = sorted(self._dirtySections)
+        self._dirtySections = set()
+        if self._derivedSections:
+            sections = [section for section in sections
+                        if section not in self._derivedSections or self._derivedChanged(section)]
+            if not sections:
+                return
+
+        # coalesce into contiguous runs of rows and emit once per run
+        first = last = sections[0]
+        for section in sections[1:]:
+            if section != last + 1:
+                self._emitRange(first, last)
+                first = section
+            last = section
+        self._emitRange(first, last)
+
+        if self._subscribers:
+            for section in sections:
+                if section in self._subscribers:
+                    self._dispatch(section)
+
+
+# placeholder for derived sections in compact storage and marker for 'no previous value'
+_DERIVED = object()
+
+
+def callbackRef(callback):
+    """Return a weak reference to a bound method or a strong reference-like callable for anything else.  Either
+    way calling the result gives back callback, or None once a bound method's object has been collected"""
+    if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+        return weakref.WeakMethod(callback)
+    return partial(_strongRef, callback)
+
+
+def _strongRef(callback):
+    # stands in for a weakref to callables which must be kept alive by the subscription itself
+    return callback
+
+
+# immutable types whose == can be trusted to give a plain bool
+_SCALARS = frozenset((int, float, bool, str, bytes, complex, type(None)))
+
+
+def valuesEqual(old, new):
+    """Default equality test used by DescriptorModelItem to decide whether a write changed anything.
+    NumPy arrays are compared element-wise.  Re-assigning the very same mutable object (e.g. a list or
+    array which was modified in place) always counts as a change so that views still get refreshed"""
+    cls = old.__class__
+    if cls is new.__class__ and cls in _SCALARS:
+        return old is new or old == new     # the common case, answered without any of the checks below
+    if old is new:
+        try:
+            hash(old)
+        except TypeError:
+            return False
+        return True
+    if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+        return (isinstance(old, np.ndarray) and isinstance(new, np.ndarray) and old.shape == new.shape
+                and old.dtype == new.dtype and np.array_equal(old, new))
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+
+def valuesClose(old, new, tolerance):
+    """Like valuesEqual but real numbers within tolerance of each other are considered equal"""
+    if isinstance(old, Real) and isinstance(new, Real) and not isinstance(old, bool) and not isinstance(new, bool):
+        return abs(new - old) <= tolerance
+    return valuesEqual(old, new)
+
 
 class DescriptorModelItem:
     """This is a descriptor class which should be used as a class attribute to manage data access in classes
@@ -75,28 +579,155 @@ class DescriptorModelItem:
     to support data lookup via an integer as required by the Qt model view framework.  The name 'section' is
     used because this is the terminology used in QDataWidgetMapper which is the glue which can be used to
     tie models to widgets or views in Qt
+
+    Writes which don't change the value are ignored.  By default values are compared with valuesEqual, pass
+    tolerance to treat nearby numbers as equal or pass equals=func(old, new) for a custom comparison
+
+    Subclasses may set coerce to a function which converts every written value to the stored type (see
+    TypedModelItems).  It should raise TypeError or ValueError for values which can't be stored.
     """
-    def __init__(self, initialVal=None):
+    coerce = None
+
+    def __init__(self, initialVal=None, equals=None, tolerance=None):
         self._initialVal = initialVal
+        if equals is None:
+            equals = valuesEqual if tolerance is None else partial(valuesClose, tolerance=tolerance)
+        self.equals = equals
 
     def __set_name__(self, owner, name):
         self.private_name = '_' + name
         self.public_name = name
-        self.section = None    # we'll come back later and set this
-        setattr(owner, self.private_name, self._initialVal)
+        self.section = None    # AbstractDescriptorModel.__init_subclass__ will come back later and set this
+        if not getattr(owner, 'compactStorage', False):
+            setattr(owner, self.private_name, self._initialVal)
 
     def __get__(self, obj, objtype=None):
         if obj is None:
             return self  # accessed on class, return descriptor itself
-        else:
-            return getattr(obj, self.private_name)
+        if obj._stats is not None:
+            obj._stats.gets[self.section] += 1
+        values = obj._values
+        if values is not None:
+            return values[self.section]
+        return getattr(obj, self.private_name)
+
+    def dataValue(self, obj):
+        """Return the value of obj as handed to views by data().  Items holding mutable buffers override this
+        to hand out read only views"""
+        return self.__get__(obj)
+
+    def snapshotValue(self, obj):
+        """Return the value of obj in a form which won't change along with obj.  See snapshot()"""
+        value = self.__get__(obj)
+        return value.copy() if isinstance(value, np.ndarray) else value
 
     def __set__(self, obj, val):
-        # first update the data
-        setattr(obj, self.private_name, val)
+        # typed items convert or reject the value before anything else happens
+        if self.coerce is not None:
+            val = self.coerce(val)
+
+        if obj._fastWrites:
+            # nothing optional is switched on, so this is _assign without any of its checks
+            values = obj._values
+            if values is None:
+                if self.equals(getattr(obj, self.private_name), val):
+                    obj.suppressedNotifications += 1
+                    return
+                setattr(obj, self.private_name, val)
+            else:
+                if self.equals(values[self.section], val):
+                    obj.suppressedNotifications += 1
+                    return
+                if values.__class__ is tuple:
+                    values = obj._values = list(values)
+                values[self.section] = val
+            index = obj.createIndex(self.section, 0, None)
+            obj.dataChanged.emit(index, index)
+            return
+
+        if obj._stats is not None:
+            obj._stats.sets[self.section] += 1
+        self._assign(obj, val)
+
+    def _assign(self, obj, val):
+        """Store val, which has already been through coerce, and notify obj if it changed"""
+        # first update the data.  Models in thread safe mode serialize the compare and write
+        lock = obj._lock
+        if lock is None:
+            changed = self._store(obj, val)
+        else:
+            with lock:
+                changed = self._store(obj, val)
+        if not changed:
+            return
 
         # obj is intended to be derived from a model view model ( such as QAbstractItemModel ).
         # In Qt, when we set data on a model view model, we need to emit the signal dataChanged
-        # to let views know that they should update.
-        index = obj.createIndex(self.section, 0, None)     # tell the view what updated...
-        obj.dataChanged.emit(index, index)
+        # to let views know that they should update.  The model decides whether to emit now or
+        # defer the notification until the end of a batch
+        obj._notifySection(self.section)
+
+    def _store(self, obj, val):
+        """Write val into obj and return True, or return False if the value didn't actually change"""
+        values = obj._values
+        old = values[self.section] if values is not None else getattr(obj, self.private_name)
+
+        # nothing to do if the value didn't actually change.  Skipping here also breaks feedback loops
+        # where a widget commits a value, gets refreshed by the model and commits the same value again
+        if self.equals(old, val):
+            obj.suppressedNotifications += 1
+            return False
+
+        if values is None:
+            setattr(obj, self.private_name, val)
+        else:
+            if values.__class__ is tuple:
+                values = obj._values = list(values)   # first write, stop sharing the class defaults
+            values[self.section] = val
+        if obj._journal is not None:
+            obj._journal.record(self.section, old, val)
+        return True
+
+
+class DerivedModelItem(DescriptorModelItem):
+    """A read only DescriptorModelItem whose value is computed as func(model) from other attributes of the
+    model.  depends_on lists the names of those attributes.  The value is computed on first read and cached
+    until one of the dependencies changes.  Views mapped to the section are notified only when the recomputed
+    value actually differs, and nothing is recomputed for a value that nobody reads or watches
+    """
+    def __init__(self, func, depends_on=(), equals=None, tolerance=None):
+        super().__init__(None, equals=equals, tolerance=tolerance)
+        self.func = func
+        self.dependsOn = tuple(depends_on)
+
+    def __set_name__(self, owner, name):
+        self.private_name = '_' + name
+        self.public_name = name
+        self.section = None    # AbstractDescriptorModel.__init_subclass__ will come back later and set this
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj._stats is not None:
+            obj._stats.gets[self.section] += 1
+        cache = obj._derivedValues
+        try:
+            return cache[self.section]
+        except KeyError:
+            pass
+        lock = obj._lock
+        if lock is None:
+            value = cache[self.section] = self.func(obj)
+            return value
+
+        # in thread safe mode another thread may write a dependency while func runs.  The value is then only
+        # cached if no invalidation happened in the meantime, otherwise it could stay stale for good
+        generation = obj._derivedGeneration
+        value = self.func(obj)
+        with lock:
+            if obj._derivedGeneration == generation:
+                cache[self.section] = value
+        return value
+
+    def __set__(self, obj, val):
+        raise AttributeError(f'{self.public_name!r} is derived from {", ".join(self.dependsOn)} and can\'t be set')
@@ -0,0 +1,177 @@
+import numpy as np
+from AbstractDescriptorModel import callbackRef
+from TypedModelItems import ArrayItem
+
+
+class ArrayModelItem(ArrayItem):
+    """An ArrayItem for large numeric buffers which are updated piecewise.  Reading the attribute gives an
+    ArrayHandle rather than the array itself.  Indexing the handle returns read only views of the buffer, no
+    copies, and assigning to a slice of the handle writes into the buffer in place and notifies the model:
+
+    class ScopeModel(AbstractDescriptorModel):
+        trace = ArrayModelItem(np.float32, (None,), np.zeros(100000))
+
+    model.trace[100:200] = chunk         # in place, views mapped to 'trace' are notified
+    latest = model.trace[100:200]        # read only view
+    np.asarray(model.trace)              # read only view of the whole buffer
+    model.trace.subscribe(callback)      # callback(start, stop) with the rows written since the last call
+    model.data(index, Qt.DisplayRole)   # read only view, like everything views get from the model
+
+    Assigning the whole attribute copies into the existing buffer when the shape is unchanged and only
+    reallocates when it isn't.  Range callbacks run when the model sends out its notification for the section
+    so they follow batching, throttling and thread safe mode just like dataChanged does.
+    """
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj._stats is not None:
+            obj._stats.gets[self.section] += 1
+        return self._handle(obj)
+
+    def __set__(self, obj, val):
+        # never takes DescriptorModelItem's fast path, the value goes into the existing buffer
+        if obj._stats is not None:
+            obj._stats.sets[self.section] += 1
+        self._assign(obj, self.coerce(val))
+
+    def _assign(self, obj, val):
+        handle = self._handle(obj)
+        lock = obj._lock
+        if lock is not None:
+            lock.acquire()
+        try:
+            if self.equals(handle._array, val):
+                obj.suppressedNotifications += 1
+                return
+            if val.shape == handle._array.shape:
+                np.copyto(handle._array, val)
+            else:
+                handle._array = np.array(val)
+            handle._touch(0, len(handle._array))
+        finally:
+            if lock is not None:
+                lock.release()
+        obj._notifySection(self.section)
+
+    def dataValue(self, obj):
+        return self._handle(obj).view()
+
+    def snapshotValue(self, obj):
+        return self._handle(obj)._array.copy()
+
+    def _handle(self, obj):
+        # the handle lives in the normal storage slot.  Until the first access that slot holds the class
+        # default array, which is copied so that in place writes never leak into other instances
+        values = obj._values
+        stored = values[self.section] if values is not None else getattr(obj, self.private_name)
+        if isinstance(stored, ArrayHandle) and stored._model is obj:
+            return stored
+        handle = ArrayHandle(obj, self, np.array(stored, dtype=self.dtype))
+        if values is None:
+            setattr(obj, self.private_name, handle)
+        else:
+            if values.__class__ is tuple:
+                values = obj._values = list(values)
+            values[self.section] = handle
+        return handle
+
+
+class ArrayHandle:
+    """Access to the buffer of one ArrayModelItem on one model.  See ArrayModelItem"""
+    __slots__ = ('_model', '_item', '_array', '_dirty', '_rangeSubscribers', '__weakref__')
+
+    def __init__(self, model, item, array):
+        self._model = model
+        self._item = item
+        self._array = array
+        self._dirty = None             # (start, stop) of the rows written since range subscribers last ran
+        self._rangeSubscribers = []
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return np.array(self._array, dtype=dtype)
+        return self.view() if dtype is None else np.asarray(self.view(), dtype=dtype)
+
+    def __len__(self):
+        return len(self._array)
+
+    def __repr__(self):
+        return f'ArrayHandle({self._array!r})'
+
+    @property
+    def shape(self):
+        return self._array.shape
+
+    @property
+    def dtype(self):
+        return self._array.dtype
+
+    def view(self):
+        """Read only view of the whole buffer"""
+        view = self._array.view()
+        view.flags.writeable = False
+        return view
+
+    def __getitem__(self, key):
+        view = self._array[key]
+        if isinstance(view, np.ndarray):
+            view.flags.writeable = False
+        return view
+
+    def __setitem__(self, key, value):
+        model = self._model
+        if model._stats is not None:
+            model._stats.sets[self._item.section] += 1
+        lock = model._lock
+        if lock is not None:
+            lock.acquire()
+        try:
+            self._array[key] = value
+            self._touch(*self._rowRange(key))
+        finally:
+            if lock is not None:
+                lock.release()
+        model._notifySection(self._item.section)
+
+    def subscribe(self, callback):
+        """Call callback(start, stop) with the range of rows written since the last call whenever the model
+        notifies views of this array.  Bound methods are only weakly referenced"""
+        if not self._rangeSubscribers:
+            self._model.subscribe(self._item.section, self._deliver)
+        self._rangeSubscribers.append(callbackRef(callback))
+
+    def unsubscribe(self, callback):
+        self._rangeSubscribers[:] = [ref for ref in self._rangeSubscribers if ref() not in (None, callback)]
+        if not self._rangeSubscribers:
+            self._model.unsubscribe(self._item.section, self._deliver)
+
+    def _rowRange(self, key):
+        # rows along the first axis touched by key.  Anything fancier than an int or a slice counts as everything
+        n = len(self._array)
+        first = key[0] if isinstance(key, tuple) and key else key
+        if isinstance(first, slice):
+            start, stop, step = first.indices(n)
+            if step < 0:
+                start, stop = stop + 1, start + 1
+            return start, max(start, stop)
+        if isinstance(first, (int, np.integer)):
+            row = first + n if first < 0 else first
+            return row, row + 1
+        return 0, n
+
+    def _touch(self, start, stop):
+        if self._rangeSubscribers and stop > start:
+            dirty = self._dirty
+            self._dirty = (start, stop) if dirty is None else (min(dirty[0], start), max(dirty[1], stop))
+
+    def _deliver(self, value):
+        dirty, self._dirty = self._dirty, None
+        if dirty is None:
+            return
+        for ref in list(self._rangeSubscribers):
+            callback = ref()
+            if callback is None:
+                self._rangeSubscribers.remove(ref)
+            else:
+                callback(*dirty)
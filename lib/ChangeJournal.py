@@ -0,0 +1,92 @@
+from collections import deque
+from contextlib import contextmanager
+import time
+
+
+class ChangeJournal:
+    """A bounded undo/redo history of (section, old, new) changes, used by AbstractDescriptorModel.enableJournal.
+
+    Only the values of the one section which changed are kept, never copies of the whole model, and at most
+    maxEntries changes are remembered (the oldest are dropped first).  Consecutive changes to the same section
+    less than mergeInterval seconds apart are merged into one entry, so dragging a slider back and forth is
+    undone in a single step.  All changes made inside group() form a single entry as well.
+    """
+
+    def __init__(self, maxEntries=1000, mergeInterval=0.5):
+        self.mergeInterval = mergeInterval
+        self._undo = deque(maxlen=maxEntries)
+        self._redo = deque(maxlen=maxEntries)
+        self._replaying = False
+        self._group = None      # section -> [old, new] while inside group()
+
+    def __len__(self):
+        return len(self._undo)
+
+    def canUndo(self):
+        return bool(self._undo)
+
+    def canRedo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    @contextmanager
+    def group(self):
+        """Record every change made inside the with block as one entry, which is undone and redone as a whole"""
+        if self._group is not None:
+            yield
+            return
+        self._group = {}
+        try:
+            yield
+        finally:
+            group, self._group = self._group, None
+            if group:
+                sections = tuple(group)
+                self._undo.append([sections, [group[section][0] for section in sections],
+                                   [group[section][1] for section in sections], time.monotonic()])
+
+    def record(self, section, old, new):
+        if self._replaying:
+            return
+        if self._group is not None:
+            change = self._group.get(section)
+            if change is None:
+                self._group[section] = [old, new]
+            else:
+                change[1] = new
+            self._redo.clear()
+            return
+        now = time.monotonic()
+        if self._undo:
+            last = self._undo[-1]
+            if last[0] == section and now - last[3] <= self.mergeInterval:
+                last[2] = new
+                last[3] = now
+                self._redo.clear()
+                return
+        self._undo.append([section, old, new, now])
+        self._redo.clear()
+
+    def popUndo(self, count):
+        """Remove up to count entries for undoing, newest first, and make them available to redo"""
+        entries = [self._undo.pop() for _ in range(min(count, len(self._undo)))]
+        self._redo.extend(entries)
+        return [change for entry in entries for change in reversed(_changes(entry[0], entry[1]))]
+
+    def popRedo(self, count):
+        """Remove up to count entries for redoing, oldest first, and make them available to undo again"""
+        entries = [self._redo.pop() for _ in range(min(count, len(self._redo)))]
+        for entry in entries:
+            entry[3] = float('-inf')     # a redone entry must never be merged with the next edit
+        self._undo.extend(entries)
+        return [change for entry in entries for change in _changes(entry[0], entry[2])]
+
+
+def _changes(section, values):
+    # the (section, value) pairs of one entry, a group entry holds a tuple of sections and a list of values
+    if isinstance(section, tuple):
+        return list(zip(section, values))
+    return [(section, values)]
@@ -1,7 +1,7 @@
 from qtpy.QtWidgets import QPushButton, QStyle, QColorDialog, QStylePainter, QStyleOptionButton
 from qtpy.QtCore import Signal, Qt, Property
 from qtpy.QtGui import QPainter, QBrush, QColor
-import numpy as np
+from PaletteService import mkColor
 
 
 class ColorButton(QPushButton):
@@ -78,20 +78,7 @@ class ColorButton(QPushButton):
 
     @staticmethod
     def mkColor(args):
-        if isinstance(args, QColor):
-            return args
-        elif len(args) == 3:
-            (r, g, b) = args
-            a = 255
-        elif len(args) == 4:
-            (r, g, b, a) = args
-        else:
-            raise RuntimeError('unhandled args to mkColor')
-
-        args = [r, g, b, a]
-        args = [0 if np.isnan(a) or np.isinf(a) else a for a in args]
-        args = list(map(int, args))
-        return QColor(*args)
+        return mkColor(args)
 
     @Property(tuple, user=True)
     def color(self):
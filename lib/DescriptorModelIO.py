@@ -0,0 +1,134 @@
+"""Binary save and load of AbstractDescriptorModel instances.  Models are written column-wise into the NumPy npz
+format: one array per section holding that section's value for every model, so a thousand StarModels are
+saved as two arrays rather than a thousand records.  Array valued sections are stacked into a single array
+with an extra leading axis when all models agree on the shape and are otherwise stored one array per model.
+Likewise a section whose models hold values of different Python types, e.g. 5 in one and 2.5 or 'abc' in
+another, is stored one value per model, since stacking would convert them all to a common type.
+Nothing is pickled, so values must be numbers, bools, strings, NumPy arrays or None.  None values (the default
+of an unset DescriptorModelItem) are stored as a placeholder plus a boolean mask array named '<section>/none'.
+
+saveModels('stars.npz', stars)
+stars = loadModels('stars.npz', StarModel, factory=lambda: StarModel(0, 0))
+
+data = dumps(controlModel)       # single models to and from bytes
+loads(data, controlModel)        # restores in place with one coalesced notification
+"""
+import io
+import numpy as np
+
+
+def saveModels(file, models):
+    """Write models, which must all be instances of the same class, to file (a path or a binary file object)"""
+    models = list(models)
+    if not models:
+        raise ValueError('no models to save')
+    modelClass = type(models[0])
+    if any(type(model) is not modelClass for model in models):
+        raise TypeError('all models saved together must be of the same class')
+
+    snapshots = [model.snapshot() for model in models]
+    arrays = {'__class__': np.array(modelClass.__name__), '__count__': np.array(len(models))}
+    for section, name in enumerate(modelClass._sectionNames):
+        if section in modelClass._derivedSections:
+            continue
+        values = [snapshot[section] for snapshot in snapshots]
+        missing = [value is None for value in values]
+        mixed = _mixedTypes(values)
+        if any(missing):
+            arrays[f'{name}/none'] = np.array(missing)
+            values = _filled(values)
+        column = None if mixed else _column(name, values)
+        if column is not None:
+            arrays[name] = column
+        else:
+            # ragged arrays and mixed types can't be stacked, store one array per model instead
+            if mixed:
+                arrays[f'{name}/mixed'] = np.array(True)
+            for i, value in enumerate(values):
+                arrays[f'{name}/{i}'] = _checked(name, np.asarray(value))
+    np.savez(file, **arrays)
+
+
+def loadModels(file, modelClass, factory=None):
+    """Read models written by saveModels.  New instances are made with factory(), which defaults to
+    modelClass(), and then restored from the file"""
+    factory = modelClass if factory is None else factory
+    with np.load(file, allow_pickle=False) as data:
+        if str(data['__class__']) != modelClass.__name__:
+            raise TypeError(f'file holds {data["__class__"]} models, not {modelClass.__name__}')
+        count = int(data['__count__'])
+        columns = []
+        for section, name in enumerate(modelClass._sectionNames):
+            if section in modelClass._derivedSections:
+                columns.append([None] * count)
+            else:
+                columns.append(_readColumn(data, name, count))
+
+    models = []
+    for snapshot in zip(*columns):
+        model = factory()
+        model.restore(snapshot)
+        models.append(model)
+    return models
+
+
+def dumps(model):
+    """Return the values of a single model as bytes"""
+    buffer = io.BytesIO()
+    saveModels(buffer, [model])
+    return buffer.getvalue()
+
+
+def loads(data, model):
+    """Restore model from bytes written by dumps.  Views are notified once"""
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        if str(arrays['__class__']) != type(model).__name__:
+            raise TypeError(f'data holds a {arrays["__class__"]} model, not {type(model).__name__}')
+        snapshot = []
+        for section, name in enumerate(type(model)._sectionNames):
+            if section in type(model)._derivedSections:
+                snapshot.append(None)
+            else:
+                snapshot.append(_readColumn(arrays, name, 1)[0])
+    model.restore(snapshot)
+
+
+def _column(name, values):
+    # stack one section's values into a single array, or return None if they are arrays of differing shapes
+    if any(isinstance(value, np.ndarray) for value in values):
+        if len({np.shape(value) for value in values}) != 1:
+            return None
+    return _checked(name, np.asarray(values))
+
+
+def _mixedTypes(values):
+    # True when the plain (non array) values are not all of one type, np.asarray would convert them
+    return len({type(value) for value in values if value is not None and not isinstance(value, np.ndarray)}) > 1
+
+
+def _filled(values):
+    # replace None by a zero of the same kind as the other values so that the column can still be stacked
+    present = [value for value in values if value is not None]
+    fill = np.zeros_like(np.asarray(present[0])) if present else False
+    return [fill if value is None else value for value in values]
+
+
+def _readColumn(data, name, count):
+    # the values of one section for count models, with the masked ones put back to None
+    if name in data:
+        column = data[name]
+        values = column.tolist() if column.ndim == 1 else list(column)
+    else:
+        values = [data[f'{name}/{i}'] for i in range(count)]
+        if f'{name}/mixed' in data:
+            values = [value.item() for value in values]
+    mask = f'{name}/none'
+    if mask in data:
+        values = [None if missing else value for value, missing in zip(values, data[mask].tolist())]
+    return values
+
+
+def _checked(name, array):
+    if array.dtype == object:
+        raise TypeError(f'{name!r} holds values which can only be saved by pickling them')
+    return array
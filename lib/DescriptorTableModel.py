@@ -0,0 +1,292 @@
+from qtpy.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from qtpy.QtCore import Qt
+import numpy as np
+from AbstractDescriptorModel import DerivedModelItem
+from TypedModelItems import ArrayItem
+
+
+class DescriptorTableModel(QAbstractTableModel):
+    """A table model holding many records which all share the layout of one AbstractDescriptorModel
+    subclass (the 'schema').  Each DescriptorModelItem of the schema becomes a column, using its section as
+    the column number, and each record becomes a row.  Values are stored column-wise in NumPy arrays so
+    that whole columns can be handed out without copying.  Typed items (see TypedModelItems) get a column of
+    their dtype.  Untyped descriptors get a float64 column when their initial value is a float, which refuses
+    writes it can't hold exactly, and an object column otherwise.  A cell holds a single value, so schemas
+    with ArrayItems or DerivedModelItems are refused with a TypeError.
+
+    For example, given the StarModel class from the star simulation:
+
+    stars = DescriptorTableModel(StarModel)
+    star = stars.appendRow(x=10, y=20)    # returns a row object which supports the usual dot syntax
+    star.x = 5                            # emits dataChanged for that one cell
+    star.setMany(x=1, y=2)                # emits one dataChanged for the row
+    xs = stars.column('x')                # read only view of all x values, no copy
+    stars.setColumn('x', xs + 1)          # bulk update with one dataChanged for the whole column
+
+    To map widgets to a single record use a QDataWidgetMapper with the default horizontal orientation and
+    point it at the record with mapper.setCurrentModelIndex(star.index())
+    """
+
+    def __init__(self, schema, parent=None):
+        super().__init__(parent)
+        self.schema = schema
+        self._columnNames = schema._sectionNames
+        self._columnSections = schema._nameSections
+        self._descriptors = schema._descriptors
+        for desc in self._descriptors:
+            if isinstance(desc, (ArrayItem, DerivedModelItem)):
+                raise TypeError(f'{schema.__name__}.{desc.public_name} is a {type(desc).__name__}, which can not '
+                                f'be a column of a DescriptorTableModel')
+        self._size = 0
+        self._columns = [np.empty(8, dtype=_columnDtype(desc)) for desc in self._descriptors]
+        self._fills = [_columnFill(desc) for desc in self._descriptors]
+        self._rows = []      # row -> row proxy, kept aligned with the columns
+        self._rowClass = _rowClass(schema)
+
+        # number of writes which didn't change the value and therefore didn't notify views
+        self.suppressedNotifications = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row):
+        return self._rows[row]
+
+    def __iter__(self):
+        return iter(list(self._rows))
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._size
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self._columnNames[section] if orientation == Qt.Horizontal else section
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in [Qt.DisplayRole, Qt.EditRole]:
+            return self._columns[index.column()].item(index.row())
+        else:
+            return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        try:
+            self.setValue(index.row(), index.column(), value)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or not 0 <= row <= self._size:
+            return False
+        self._reserve(self._size + count)
+        self.beginInsertRows(QModelIndex(), row, row + count - 1)
+        for column, fill in zip(self._columns, self._fills):
+            column[row + count:self._size + count] = column[row:self._size]
+            column[row:row + count] = fill
+        self._size += count
+        self._rows[row:row] = [self._rowClass(self, QPersistentModelIndex(self.index(row + i, 0)))
+                               for i in range(count)]
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count <= 0 or row < 0 or row + count > self._size:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for column in self._columns:
+            column[row:self._size - count] = column[row + count:self._size]
+        self._size -= count
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def appendRow(self, **values):
+        """Add a record at the end of the table and return its row object.  Columns not given in values
+        start out with their descriptor's initial value"""
+        row = self._size
+        self.insertRows(row, 1)
+        record = self._rows[row]
+        if values:
+            record.setMany(**values)
+        return record
+
+    def column(self, name):
+        """Return a read only view of the column called name.  The view is only valid until rows are
+        inserted or removed"""
+        view = self._columns[self._columnSections[name]][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def setColumn(self, name, values, start=0):
+        """Write values into the column called name starting at row start and emit a single dataChanged
+        covering every row written.  A single value is written to every row from start on.  Values are
+        converted and checked like setValue does, a TypeError or ValueError leaves the column untouched"""
+        section = self._columnSections[name]
+        desc = self._descriptors[section]
+        column = self._columns[section]
+        if np.ndim(values) == 0:
+            values = desc.coerce(values) if desc.coerce is not None else _exact(column, values)
+            stop = self._size
+        else:
+            values = _coerceColumn(desc, column, values)
+            stop = start + len(values)
+        if not 0 <= start <= stop <= self._size:
+            raise IndexError(f'rows {start}:{stop} out of range for table of {self._size} rows')
+        if stop == start:
+            return
+        column[start:stop] = values
+        self.dataChanged.emit(self.index(start, section), self.index(stop - 1, section))
+
+    def value(self, row, section):
+        return self._columns[section].item(row)
+
+    def setValue(self, row, section, value):
+        """Write a single cell and notify views, unless the value didn't change"""
+        desc = self._descriptors[section]
+        column = self._columns[section]
+        value = desc.coerce(value) if desc.coerce is not None else _exact(column, value)
+        if desc.equals(column.item(row), value):
+            self.suppressedNotifications += 1
+            return
+        column[row] = value
+        index = self.index(row, section)
+        self.dataChanged.emit(index, index)
+
+    def setRow(self, row, **values):
+        """Write several cells of one row and emit a single dataChanged spanning the cells which changed"""
+        changed = []
+        for name, value in values.items():
+            section = self._columnSections[name]
+            desc = self._descriptors[section]
+            column = self._columns[section]
+            value = desc.coerce(value) if desc.coerce is not None else _exact(column, value)
+            if desc.equals(column.item(row), value):
+                self.suppressedNotifications += 1
+                continue
+            column[row] = value
+            changed.append(section)
+        if changed:
+            self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+
+    def _reserve(self, size):
+        capacity = len(self._columns[0]) if self._columns else 0
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for i, column in enumerate(self._columns):
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[i] = grown
+
+
+class DescriptorTableRow:
+    """Lightweight handle to one record of a DescriptorTableModel.  Attribute access reads and writes the
+    table's columns.  The handle follows its record when other rows are inserted or removed and becomes
+    invalid once its own record is removed"""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def row(self):
+        row = self._index.row()
+        if row < 0:
+            raise RuntimeError('this record has been removed from its table')
+        return row
+
+    def isValid(self):
+        return self._index.isValid()
+
+    def model(self):
+        return self._table
+
+    def index(self, column=0):
+        return self._table.index(self.row(), column)
+
+    def setMany(self, **values):
+        """Set several values of this record and notify views once"""
+        self._table.setRow(self.row(), **values)
+
+
+def _rowClass(schema):
+    # build a DescriptorTableRow subclass with one property per column of the schema
+    def columnProperty(section):
+        def fget(self):
+            return self._table._columns[section].item(self.row())
+
+        def fset(self, value):
+            self._table.setValue(self.row(), section, value)
+        return property(fget, fset)
+
+    namespace = {name: columnProperty(section) for section, name in enumerate(schema._sectionNames)}
+    namespace['__slots__'] = ()
+    return type(schema.__name__ + 'Row', (DescriptorTableRow,), namespace)
+
+
+def _columnDtype(desc):
+    # typed items know their dtype.  Untyped descriptors only get a NumPy column when their initial value is a
+    # float, anything else (ints, bools, strings, None) is kept as is in an object column since a narrower
+    # column would silently truncate later writes, e.g. 250.7 into an int column or 'abcdef' into '<U3'
+    if getattr(desc, 'dtype', None) is not None:
+        return desc.dtype
+    if isinstance(desc._initialVal, (float, np.floating)):
+        return np.float64
+    return object
+
+
+def _columnFill(desc):
+    return desc._initialVal
+
+
+def _coerceColumn(desc, column, values):
+    # setColumn's counterpart of the coerce or _exact call in setValue, done for the whole array at once
+    coerceArray = getattr(desc, 'coerceArray', None)
+    if coerceArray is not None:
+        values = coerceArray(values)
+        if values.ndim != 1:
+            raise ValueError(f'expected one value per row but got an array of shape {values.shape}')
+        return values
+    if column.dtype == object:
+        # no np.asarray here, it would turn e.g. [1, 'a'] into two strings
+        items = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        if desc.coerce is not None:
+            items = [desc.coerce(item) for item in items]
+        result = np.empty(len(items), dtype=object)
+        for i, item in enumerate(items):
+            result[i] = item
+        return result
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if values.ndim != 1:
+        raise ValueError(f'expected one value per row but got an array of shape {values.shape}')
+    if desc.coerce is not None:
+        return np.array([desc.coerce(item) for item in values.tolist()], dtype=column.dtype)
+    if kind in 'bf' and np.can_cast(values.dtype, column.dtype, casting='safe'):
+        return values.astype(column.dtype)
+    if kind in 'iu' and column.dtype == np.float64 and (not values.size or -2 ** 53 <= values.min()
+                                                        and values.max() <= 2 ** 53):
+        return values.astype(column.dtype)      # every int up to 2**53 is a float64 exactly
+    return np.array([_exact(column, item) for item in values.tolist()], dtype=column.dtype)
+
+
+def _exact(column, value):
+    # untyped descriptors have no coerce, so refuse values a float column can't hold exactly instead of
+    # storing a converted value
+    if column.dtype == object:
+        return value
+    try:
+        stored = column.dtype.type(value).item()
+        same = bool(stored == value) or (stored != stored and value != value)    # nan is fine too
+    except (TypeError, ValueError, OverflowError, AttributeError):
+        same = False
+    if not same:
+        raise ValueError(f'{value!r} can not be stored in a {column.dtype} column')
+    return stored
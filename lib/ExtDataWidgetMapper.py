@@ -1,4 +1,116 @@
+from functools import partial
+from time import perf_counter
 from qtpy.QtWidgets import QDataWidgetMapper, QCheckBox, QRadioButton, QSlider, QComboBox, QDial
+from qtpy.QtCore import QObject, QTimer
+
+
+class CommitPolicy:
+    """When a mapped widget commits its value to the model:
+
+    CommitPolicy.immediate()        on every change (the default)
+    CommitPolicy.debounce(ms)       once the widget has been still for ms milliseconds
+    CommitPolicy.throttle(hz)       at most hz times per second, the last change is always committed
+    CommitPolicy.onRelease()        sliders and dials commit when released rather than while dragged
+
+    Policies only apply to the widgets ExtDataWidgetMapper commits itself (see ExtDataWidgetMapper.commitSignals),
+    widgets such as QSpinBox or QLineEdit are committed by the item delegate as usual.  Keyboard and programmatic
+    changes of a slider aren't drags, so onRelease commits those straight away.
+    """
+    __slots__ = ('mode', 'interval')
+
+    def __init__(self, mode, interval=0.0):
+        self.mode = mode
+        self.interval = interval      # seconds
+
+    def __repr__(self):
+        return f'CommitPolicy({self.mode!r}, {self.interval!r})'
+
+    @classmethod
+    def immediate(cls):
+        return cls('immediate')
+
+    @classmethod
+    def debounce(cls, ms=250):
+        return cls('debounce', ms / 1000)
+
+    @classmethod
+    def throttle(cls, hz=10):
+        if hz <= 0:
+            raise ValueError('throttle rate must be positive')
+        return cls('throttle', 1 / hz)
+
+    @classmethod
+    def onRelease(cls):
+        return cls('onRelease')
+
+
+class _Committer(QObject):
+    # commits one mapped widget to the mapper's current delegate according to a CommitPolicy.  Parented to the
+    # mapper so that it, and its timer, live exactly as long as the mapper does
+    def __init__(self, delegate, widget, signal, policy, parent=None):
+        super().__init__(parent)
+        self.delegate = delegate
+        self.widget = widget
+        self.signal = signal
+        self.policy = policy
+        self._last = float('-inf')
+        self._timer = None
+        self._released = None
+        if policy.mode in ('debounce', 'throttle'):
+            self._timer = QTimer(self)
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.commit)
+        if policy.mode == 'onRelease' and hasattr(widget, 'sliderReleased'):
+            self._released = widget.sliderReleased
+            self._released.connect(self.commit)
+        signal.connect(self.onChanged)
+
+    def onChanged(self, *args):
+        mode = self.policy.mode
+        if mode == 'debounce':
+            self._timer.start(int(self.policy.interval * 1000))
+        elif mode == 'throttle':
+            if self._timer.isActive():
+                return      # the trailing commit will pick up this value
+            wait = self.policy.interval - (perf_counter() - self._last)
+            if wait <= 0:
+                self.commit()
+            else:
+                self._timer.start(int(wait * 1000) + 1)
+        elif mode == 'onRelease' and self._released is not None and self.widget.isSliderDown():
+            return
+        else:
+            self.commit()
+
+    def commit(self):
+        if self._timer is not None:
+            self._timer.stop()
+        self._last = perf_counter()
+        self.delegate.commitData.emit(self.widget)
+
+    def stop(self):
+        # drops a pending debounced or throttled commit
+        if self._timer is not None:
+            try:
+                self._timer.stop()
+            except RuntimeError:
+                pass    # the mapper, and the timer along with it, was deleted first, e.g. at application exit
+
+    def detach(self):
+        self.stop()
+        try:
+            self.signal.disconnect(self.onChanged)
+            if self._released is not None:
+                self._released.disconnect(self.commit)
+        except (RuntimeError, TypeError):
+            pass    # the widget is already gone and took its connections with it
+        self.dispose()
+
+    def dispose(self):
+        try:
+            self.deleteLater()
+        except RuntimeError:
+            pass
 
 
 class ExtDataWidgetMapper(QDataWidgetMapper):
@@ -8,27 +120,91 @@ class ExtDataWidgetMapper(QDataWidgetMapper):
     QStyledItemDelegate doesn't emit this signal for all widgets such as, for example QCheckBox
     and so we handle these widgets by manually triggering the commitData signal to emit from
     our delegate when one of these unhandled widgets updates.
+
+    Every mapping is kept in a registry of widget -> (section, property, committer) so that the
+    commits can be moved to a new delegate by setItemDelegate and are disconnected again by
+    removeMapping and clearMapping.  Mappings of widgets which get destroyed are removed automatically.
+
+    How often a mapped slider, dial, checkbox, etc. commits is set per mapping with a CommitPolicy:
+
+    mapper.addMapping(slider, section, policy=CommitPolicy.throttle(30))    # at most 30 model writes a second
     """
+    # widget class -> name of the signal which should commit its data
+    commitSignals = (
+        ((QCheckBox, QRadioButton), 'toggled'),
+        ((QSlider, QDial), 'valueChanged'),
+        (QComboBox, 'currentTextChanged'),
+    )
+    defaultCommitPolicy = CommitPolicy.immediate()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._mappings = {}     # widget -> [section, property, _Committer or None, destroyed slot]
+
+    def addMapping(self, widget, section, property=None, policy=None):
+        if widget in self._mappings:
+            self._disconnect(widget)
 
-    def addMapping(self, widget, section, property=None):
-        if isinstance(widget, (QCheckBox, QRadioButton)):
-            widget.toggled.connect(lambda: self.itemDelegate().commitData.emit(widget))
-        elif isinstance(widget, QSlider):
-            widget.valueChanged.connect(lambda: self.itemDelegate().commitData.emit(widget))
-        elif isinstance(widget, QDial):
-            widget.valueChanged.connect(lambda: self.itemDelegate().commitData.emit(widget))
-        elif isinstance(widget, QComboBox):
-            widget.currentTextChanged.connect(lambda: self.itemDelegate().commitData.emit(widget))
+        signal = self._commitSignal(widget)
+        committer = None
+        if signal is not None:
+            committer = _Committer(self.itemDelegate(), widget, signal, policy or self.defaultCommitPolicy, self)
+        # destroyed hands out a fresh wrapper of the dying widget, so the registry key is bound in here
+        destroyed = partial(self._widgetDestroyed, widget)
+        widget.destroyed.connect(destroyed)
+        self._mappings[widget] = [section, property, committer, destroyed]
 
         if property is not None:
             super().addMapping(widget, section, property)
         else:
             super().addMapping(widget, section)
 
+    def removeMapping(self, widget):
+        if widget in self._mappings:
+            self._disconnect(widget)
+        super().removeMapping(widget)
+
+    def clearMapping(self):
+        for widget in list(self._mappings):
+            self._disconnect(widget)
+        super().clearMapping()
+
+    def mappedSection(self, widget):
+        mapping = self._mappings.get(widget)
+        return -1 if mapping is None else mapping[0]
+
+    def mappedWidgets(self):
+        return list(self._mappings)
+
+    def commitPolicy(self, widget):
+        committer = self._mappings[widget][2]
+        return None if committer is None else committer.policy
+
     def setItemDelegate(self, delegate):
-        # after calling super().setItemDelegate, we need to find all of the QCheckBox
-        # widgets and connect them to the new delegate.  Also we should disconnect from
-        # the old one.  How do we find the list of mapped widgets?
-        raise NotImplementedError('FIXME:  implement this call')
\ No newline at end of file
+        # move the commits of the widgets QStyledItemDelegate doesn't handle over to the new delegate
+        super().setItemDelegate(delegate)
+        for mapping in self._mappings.values():
+            if mapping[2] is not None:
+                mapping[2].delegate = delegate
+
+    def _commitSignal(self, widget):
+        for widgetClass, signalName in self.commitSignals:
+            if isinstance(widget, widgetClass):
+                return getattr(widget, signalName)
+        return None
+
+    def _disconnect(self, widget):
+        section, property, committer, destroyed = self._mappings.pop(widget)
+        if committer is not None:
+            committer.detach()
+        try:
+            widget.destroyed.disconnect(destroyed)
+        except (RuntimeError, TypeError):
+            pass
+
+    def _widgetDestroyed(self, widget, obj=None):
+        # Qt already dropped the connections along with the widget, only the registry entry is left
+        mapping = self._mappings.pop(widget, None)
+        if mapping is not None and mapping[2] is not None:
+            mapping[2].stop()
+            mapping[2].dispose()
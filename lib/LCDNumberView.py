@@ -3,7 +3,9 @@ from qtpy.QtCore import Qt
 
 
 class LCDNumberView(QLCDNumber):
-    """This class facilitates connecting an integer LCD number display to a model"""
+    """This class facilitates connecting an integer LCD number display to a model.  Models which offer
+    per-section subscriptions (such as AbstractDescriptorModel) only wake the display up when its own
+    row changes, other models are watched through dataChanged"""
     def __init__(self, *args, integerDisplay=True, **kwargs):
         super().__init__(*args, **kwargs)
         self.integerDisplay = integerDisplay
@@ -13,17 +15,27 @@ class LCDNumberView(QLCDNumber):
 
     def setModel(self, model, row, column=0):
         if self.model is not None:
-            self.model.dataChanged.disconnect(self.onDataChanged)
+            if hasattr(self.model, 'subscribe'):
+                self.model.unsubscribe(self.row, self.onValueChanged)
+            else:
+                self.model.dataChanged.disconnect(self.onDataChanged)
         self.model = model
         self.row = row
         self.col = column
-        self.model.dataChanged.connect(self.onDataChanged)
-        self.display(model.data(model.createIndex(self.row, self.col, None), Qt.DisplayRole))
+        if hasattr(model, 'subscribe'):
+            model.subscribe(row, self.onValueChanged)
+        else:
+            model.dataChanged.connect(self.onDataChanged)
+        self.onValueChanged(model.data(model.createIndex(self.row, self.col, None), Qt.DisplayRole))
+
+    def onValueChanged(self, value):
+        # typed models already hand us ints so only convert when needed
+        if self.integerDisplay and not isinstance(value, int):
+            value = int(value)
+        self.display(value)
 
     def onDataChanged(self, index1, index2):
-        if index1.row() == self.row and index1.column() == self.col:
-            if self.integerDisplay:
-                self.display(int(index1.data()))
-            else:
-                self.display(index1.data())
+        # dataChanged may cover a range of rows when the model coalesces notifications
+        if index1.row() <= self.row <= index2.row() and index1.column() <= self.col <= index2.column():
+            self.onValueChanged(self.model.data(self.model.createIndex(self.row, self.col, None), Qt.DisplayRole))
 
@@ -0,0 +1,170 @@
+"""Counters and timings for the traffic between AbstractDescriptorModels and their views.
+
+inst = Instrumentation()
+inst.attach(controlModel, 'control')     # start counting for this model
+...
+print(inst.toJson())                     # per model and per section counters plus slot timings
+inst.startLiveUpdates(500)               # keep inst.liveModel up to date every 500 ms
+
+For each model and section the number of attribute reads (gets), attribute writes (sets), dataChanged
+emissions (emits), data() calls and setData() calls is counted.  Timings are kept for
+
+    dataChanged   every emission, which includes all slots connected directly to dataChanged such as
+                  QDataWidgetMapper populating its widgets
+    setData       every setData call, i.e. the whole widget commit path of a QDataWidgetMapper
+    <qualname>    every subscriber callback (see AbstractDescriptorModel.subscribe), e.g.
+                  LCDNumberView.onValueChanged
+
+liveModel is itself an AbstractDescriptorModel holding the totals, so it can be mapped to widgets like any
+other model.  Models which aren't attached cost nothing beyond a None check per access.
+"""
+import json
+import weakref
+from AbstractDescriptorModel import AbstractDescriptorModel
+from TypedModelItems import IntItem, FloatItem
+from qtpy.QtCore import QTimer
+
+
+class TimingHistogram:
+    """Call count, total and maximum duration plus a histogram with power of two microsecond buckets:
+    bucket 0 counts calls under 1 us, bucket n counts calls from 2**(n-1) up to 2**n us"""
+    __slots__ = ('count', 'total', 'maximum', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * 32
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), 31)] += 1
+
+    def toDict(self):
+        # trailing empty buckets are left out to keep exports short
+        buckets = list(self.buckets)
+        while buckets and not buckets[-1]:
+            buckets.pop()
+        return {'count': self.count, 'totalSeconds': self.total, 'maxSeconds': self.maximum, 'bucketsUs': buckets}
+
+
+class ModelStats:
+    """Counters for one model.  The per section lists are indexed by section and updated directly by
+    AbstractDescriptorModel and its descriptors"""
+
+    def __init__(self, name, sectionNames):
+        self.name = name
+        self.sectionNames = tuple(sectionNames)
+        n = len(self.sectionNames)
+        self.gets = [0] * n
+        self.sets = [0] * n
+        self.emits = [0] * n
+        self.dataCalls = [0] * n
+        self.setDataCalls = [0] * n
+        self.timings = {'dataChanged': TimingHistogram()}
+
+    def emitted(self, first, last, seconds):
+        for section in range(first, last + 1):
+            self.emits[section] += 1
+        self.timings['dataChanged'].add(seconds)
+
+    def timeSlot(self, name, seconds):
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = TimingHistogram()
+        timing.add(seconds)
+
+    def toDict(self):
+        counters = ('gets', 'sets', 'emits', 'dataCalls', 'setDataCalls')
+        return {
+            'totals': {counter: sum(getattr(self, counter)) for counter in counters},
+            'sections': {name: {counter: getattr(self, counter)[section] for counter in counters}
+                         for section, name in enumerate(self.sectionNames)},
+            'timings': {name: timing.toDict() for name, timing in self.timings.items()},
+        }
+
+
+class InstrumentationModel(AbstractDescriptorModel):
+    """Totals over all attached models, refreshed by Instrumentation.refresh"""
+    models = IntItem(0)
+    gets = IntItem(0)
+    sets = IntItem(0)
+    emits = IntItem(0)
+    dataCalls = IntItem(0)
+    setDataCalls = IntItem(0)
+    emitMs = FloatItem(0.0)          # cumulative time spent inside dataChanged emissions
+    slowestEmitMs = FloatItem(0.0)
+    setDataMs = FloatItem(0.0)       # cumulative time spent committing data from widgets
+
+
+class Instrumentation:
+    """Collects ModelStats for any number of models.  See the module documentation"""
+
+    def __init__(self):
+        self._stats = weakref.WeakKeyDictionary()    # model -> ModelStats, attaching doesn't keep models alive
+        self.liveModel = InstrumentationModel()
+        self._timer = None
+
+    def attach(self, model, name=None):
+        stats = ModelStats(name or type(model).__name__, model._sectionNames)
+        self._stats[model] = stats
+        model._stats = stats
+        model._fastWrites = False
+        return stats
+
+    def detach(self, model):
+        model._stats = None
+        model._updateFastWrites()
+        self._stats.pop(model, None)
+
+    def statsFor(self, model):
+        return self._stats[model]
+
+    def reset(self):
+        for model, stats in list(self._stats.items()):
+            self.attach(model, stats.name)
+
+    def toDict(self):
+        # models attached under the same name are told apart by their position
+        result = {}
+        for stats in self._stats.values():
+            key = stats.name
+            n = 1
+            while key in result:
+                n += 1
+                key = f'{stats.name}#{n}'
+            result[key] = stats.toDict()
+        return result
+
+    def toJson(self, **kwargs):
+        return json.dumps(self.toDict(), **kwargs)
+
+    def refresh(self):
+        """Copy the current totals into liveModel"""
+        allStats = list(self._stats.values())
+        emitTimings = [stats.timings['dataChanged'] for stats in allStats]
+        setDataTimings = [stats.timings['setData'] for stats in allStats if 'setData' in stats.timings]
+        self.liveModel.setMany(
+            models=len(allStats),
+            gets=sum(sum(stats.gets) for stats in allStats),
+            sets=sum(sum(stats.sets) for stats in allStats),
+            emits=sum(sum(stats.emits) for stats in allStats),
+            dataCalls=sum(sum(stats.dataCalls) for stats in allStats),
+            setDataCalls=sum(sum(stats.setDataCalls) for stats in allStats),
+            emitMs=1000 * sum(timing.total for timing in emitTimings),
+            slowestEmitMs=1000 * max((timing.maximum for timing in emitTimings), default=0.0),
+            setDataMs=1000 * sum(timing.total for timing in setDataTimings),
+        )
+
+    def startLiveUpdates(self, intervalMs=500):
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.timeout.connect(self.refresh)
+        self._timer.start(intervalMs)
+
+    def stopLiveUpdates(self):
+        if self._timer is not None:
+            self._timer.stop()
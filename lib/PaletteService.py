@@ -0,0 +1,96 @@
+"""Color palettes computed with NumPy and shared between widgets.
+
+palettes.colors('rainbow', 10000)         # (10000, 4) uint8 RGBA array, read only
+brushes, pens = palettes.brushesAndPens('rainbow', 10000)
+mkColor((255, 128, float('nan')))         # QColor, NaN and inf become 0 and values are clamped to 0..255
+
+A colormap is a function taking an array of positions in 0..1 and returning an (N, 3) or (N, 4) array of
+channel values in 0..255.  New colormaps are added with palettes.registerColormap(name, func).  The QBrush
+and QPen lists for the most recently used (colormap, N) pairs are cached, so building the same palette
+again is free.
+"""
+from collections import OrderedDict
+from qtpy.QtGui import QColor, QBrush, QPen
+import numpy as np
+
+
+def rainbowColors(a):
+    """Colors on the 'rainbow' spectrum for positions a between 0 and 1"""
+    x = np.asarray(a, dtype=np.float64) * 5
+    below2, below3, below4 = x < 2, x < 3, x < 4
+    red = np.select([below2, below3, below4], [255, 255 * (3 - x), 0], 120 * (5 - x))
+    green = np.select([below2, below3, below4], [120 * x, 240, 240 * (4 - x)], 0)
+    blue = np.select([below2, below3, below4], [0, 30 * (3 - x), 30 + 225 * (4 - x)], 255)
+    return np.stack([red, green, blue], axis=-1)
+
+
+def toRgba(values):
+    """Convert channel values to an (..., 4) uint8 RGBA array.  NaN and inf become 0, everything else is
+    clamped to 0..255 and a missing alpha channel is opaque"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[-1] == 3:
+        values = np.concatenate([values, np.full(values.shape[:-1] + (1,), 255.0)], axis=-1)
+    elif values.shape[-1] != 4:
+        raise ValueError('colors need 3 or 4 channels')
+    values = np.where(np.isfinite(values), values, 0)
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+def mkColor(args):
+    """A QColor from a QColor or an (r, g, b) or (r, g, b, a) sequence"""
+    if isinstance(args, QColor):
+        return args
+    try:
+        values = np.asarray(args)
+        if values.shape not in ((3,), (4,)):
+            raise ValueError('not a single color')
+        rgba = toRgba(values)
+    except (TypeError, ValueError):
+        raise RuntimeError('unhandled args to mkColor') from None
+    return QColor(*rgba.tolist())
+
+
+class PaletteService:
+    """Colormaps as NumPy arrays plus an LRU cache of the QBrush and QPen lists made from them"""
+
+    def __init__(self, maxPalettes=8):
+        self.maxPalettes = maxPalettes
+        self._colormaps = {'rainbow': rainbowColors}
+        self._cache = OrderedDict()     # (name, n) -> (colors, brushes, pens), most recently used last
+
+    def registerColormap(self, name, func):
+        self._colormaps[name] = func
+        for key in [key for key in self._cache if key[0] == name]:
+            del self._cache[key]
+
+    def colormaps(self):
+        return list(self._colormaps)
+
+    def colors(self, name, n):
+        return self._palette(name, n)[0]
+
+    def brushesAndPens(self, name, n):
+        colors, brushes, pens = self._palette(name, n)
+        return brushes, pens
+
+    def clear(self):
+        self._cache.clear()
+
+    def _palette(self, name, n):
+        key = (name, n)
+        palette = self._cache.get(key)
+        if palette is not None:
+            self._cache.move_to_end(key)
+            return palette
+
+        colors = toRgba(self._colormaps[name](np.arange(n) / max(n, 1)))
+        colors.flags.writeable = False
+        brushes = [QBrush(QColor(r, g, b, a)) for r, g, b, a in colors.tolist()]
+        pens = [QPen(brush.color()) for brush in brushes]
+        palette = self._cache[key] = (colors, brushes, pens)
+        while len(self._cache) > self.maxPalettes:
+            self._cache.popitem(last=False)
+        return palette
+
+
+palettes = PaletteService()     # shared by all widgets of the application
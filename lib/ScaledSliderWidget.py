@@ -0,0 +1,74 @@
+from qtpy.QtWidgets import QSlider
+from qtpy.QtCore import Property
+from SliderScales import LinearScale
+
+
+class ScaledSliderWidget(QSlider):
+    """A QSlider whose value property is a float on a SliderScale (see SliderScales) rather than the integer
+    slider position.  Internally the slider has resolution + 1 positions and reading value looks the position
+    up in the scale's table.  A value written with setValue, e.g. by a QDataWidgetMapper populating the
+    slider from a model, reads back exactly as long as the slider stays at the position it was put at, so
+    mapped values round trip without the mapper committing a rounded value back to the model.
+
+    slider = ScaledSliderWidget(Qt.Horizontal, scale=PowerScale(0, 1000, exponent=3), resolution=2000)
+    """
+    def __init__(self, *args, scale=None, resolution=1000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._scale = LinearScale(0, 100) if scale is None else scale
+        self._resolution = resolution
+        self._values = None
+        self._exact = None        # (position, value) of the last value written with setValue
+        self._rebuild()
+
+    def scale(self):
+        return self._scale
+
+    def setScale(self, scale):
+        current = self.value
+        self._scale = scale
+        self._rebuild(current)
+
+    def resolution(self):
+        return self._resolution
+
+    def setResolution(self, resolution):
+        if resolution < 1:
+            raise ValueError('resolution must be at least 1')
+        current = self.value
+        self._resolution = int(resolution)
+        self._rebuild(current)
+
+    def setRange(self, min, max):
+        # keeps the kind of scale, only its range changes
+        current = self.value
+        self._scale = self._scale.withRange(min, max)
+        self._rebuild(current)
+
+    def _rebuild(self, current=None):
+        self._values = self._scale.table(self._resolution)[1]
+        self._exact = None
+        super().setRange(0, self._resolution)
+        if current is not None:
+            self.setValue(current)
+
+    # we're overriding the builtin Qt property here to do our special transformations
+    @Property(float, user=True)
+    def value(self):
+        pos = super().value()
+        exact = self._exact
+        if exact is not None and exact[0] == pos:
+            return exact[1]
+        return self._values[pos]
+
+    @value.setter
+    def value(self, val):
+        val = float(val)
+        pos = self._scale.position(val, self._resolution)
+        if self._scale.minimum <= val <= self._scale.maximum:
+            self._exact = (pos, val)
+        else:
+            self._exact = None     # out of range values are clamped
+        super().setValue(pos)
+
+    def setValue(self, val):
+        self.value = val
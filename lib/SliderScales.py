@@ -0,0 +1,150 @@
+"""Scales which map the integer positions of a ScaledSliderWidget onto values.  A scale maps t in 0..1 onto
+minimum..maximum and back.  For each slider resolution a lookup table of the value at every position is
+computed once and shared, so turning a position into a value is a list lookup and turning a value into a
+position is one call of the scale's inverse.
+
+LinearScale(0, 10)
+LogScale(1e-8, 100)                      # equal ratios per step, minimum must be positive
+PowerScale(0, 1000, exponent=2)          # finer steps near minimum for exponent > 1
+SymLogScale(-100, 100, linthresh=1)      # logarithmic on both sides of zero, linear within +-linthresh
+PiecewiseLinearScale([0, 1, 10, 100])    # linear between knots spread evenly over the slider
+"""
+import copy
+import math
+import numpy as np
+
+
+class SliderScale:
+    """Base class of all scales.  Subclasses implement forward(t) and inverse(value) on NumPy arrays and may
+    extend _validate to check their range"""
+
+    def __init__(self, minimum, maximum):
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self._validate()
+        self._tables = {}     # resolution -> (values as ndarray, values as list)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.minimum!r}, {self.maximum!r})'
+
+    def _validate(self):
+        if not self.minimum < self.maximum:
+            raise ValueError('minimum must be less than maximum')
+
+    def forward(self, t):
+        raise NotImplementedError
+
+    def inverse(self, value):
+        raise NotImplementedError
+
+    def withRange(self, minimum, maximum):
+        """A copy of this scale over a different range"""
+        scale = copy.copy(self)
+        scale.minimum = float(minimum)
+        scale.maximum = float(maximum)
+        scale._validate()
+        scale._tables = {}
+        return scale
+
+    def table(self, resolution):
+        """The values at positions 0..resolution, as an increasing ndarray and as a list of floats"""
+        tables = self._tables.get(resolution)
+        if tables is None:
+            values = np.asarray(self.forward(np.linspace(0.0, 1.0, resolution + 1)), dtype=np.float64)
+            values[0] = self.minimum       # don't let rounding move the ends of the range
+            values[-1] = self.maximum
+            tables = self._tables[resolution] = (values, values.tolist())
+        return tables
+
+    def position(self, value, resolution):
+        """The position whose value is closest to value, clamped to 0..resolution.  inverse gives the position
+        straight away, the table only settles which of its neighbours is closest after rounding"""
+        if not value > self.minimum:
+            return 0
+        if value >= self.maximum:
+            return resolution
+        values = self.table(resolution)[1]
+        pos = min(max(round(float(self.inverse(value)) * resolution), 0), resolution)
+        while pos < resolution and values[pos + 1] - value < value - values[pos]:
+            pos += 1
+        while pos > 0 and value - values[pos - 1] < values[pos] - value:
+            pos -= 1
+        return pos
+
+
+class LinearScale(SliderScale):
+    def forward(self, t):
+        return self.minimum + (self.maximum - self.minimum) * t
+
+    def inverse(self, value):
+        return (value - self.minimum) / (self.maximum - self.minimum)
+
+
+class LogScale(SliderScale):
+    def _validate(self):
+        super()._validate()
+        if self.minimum <= 0:
+            raise ValueError('min range must be greater than zero and less than max')
+
+    def forward(self, t):
+        return self.minimum * np.exp(math.log(self.maximum / self.minimum) * t)
+
+    def inverse(self, value):
+        return np.log(np.asarray(value) / self.minimum) / math.log(self.maximum / self.minimum)
+
+
+class PowerScale(SliderScale):
+    def __init__(self, minimum, maximum, exponent=2.0):
+        if exponent <= 0:
+            raise ValueError('exponent must be positive')
+        self.exponent = float(exponent)
+        super().__init__(minimum, maximum)
+
+    def forward(self, t):
+        return self.minimum + (self.maximum - self.minimum) * np.power(t, self.exponent)
+
+    def inverse(self, value):
+        return np.power((np.asarray(value) - self.minimum) / (self.maximum - self.minimum), 1 / self.exponent)
+
+
+class SymLogScale(SliderScale):
+    def __init__(self, minimum, maximum, linthresh=1.0):
+        if linthresh <= 0:
+            raise ValueError('linthresh must be positive')
+        self.linthresh = float(linthresh)
+        super().__init__(minimum, maximum)
+
+    def _symlog(self, value):
+        return np.sign(value) * np.log1p(np.abs(value) / self.linthresh)
+
+    def forward(self, t):
+        lo, hi = self._symlog(self.minimum), self._symlog(self.maximum)
+        y = lo + (hi - lo) * np.asarray(t)
+        return np.sign(y) * self.linthresh * np.expm1(np.abs(y))
+
+    def inverse(self, value):
+        lo, hi = self._symlog(self.minimum), self._symlog(self.maximum)
+        return (self._symlog(np.asarray(value)) - lo) / (hi - lo)
+
+
+class PiecewiseLinearScale(SliderScale):
+    def __init__(self, knots):
+        self.knots = np.array(knots, dtype=np.float64)
+        if len(self.knots) < 2 or np.any(np.diff(self.knots) <= 0):
+            raise ValueError('knots must be at least two strictly increasing values')
+        self._ts = np.linspace(0.0, 1.0, len(self.knots))
+        super().__init__(self.knots[0], self.knots[-1])
+
+    def __repr__(self):
+        return f'PiecewiseLinearScale({self.knots.tolist()!r})'
+
+    def withRange(self, minimum, maximum):
+        # stretch the knots onto the new range
+        unit = (self.knots - self.minimum) / (self.maximum - self.minimum)
+        return PiecewiseLinearScale(minimum + (maximum - minimum) * unit)
+
+    def forward(self, t):
+        return np.interp(t, self._ts, self.knots)
+
+    def inverse(self, value):
+        return np.interp(value, self.knots, self._ts)
@@ -0,0 +1,178 @@
+"""Typed variants of DescriptorModelItem.  Each one converts (and where asked, clamps) a value once when it is
+written so that reading it back always gives the right type.  Values which can't be converted are rejected
+with a TypeError or ValueError before anything is stored or any view is notified.  When a widget commits such
+a value through AbstractDescriptorModel.setData the write is refused and the widget keeps its old value.
+
+IntItem, FloatItem and BoolItem also have coerceArray, the same conversion applied to a whole array at once,
+which DescriptorTableModel.setColumn uses for bulk writes.
+
+class ExampleModel(AbstractDescriptorModel):
+    count = IntItem(10, minimum=0, maximum=100)
+    gain = FloatItem(1.0, minimum=0)
+    enabled = BoolItem(False)
+    mode = EnumItem(['fast', 'slow'])
+    trace = ArrayItem(np.float32, (None, 2))    # any number of rows, two columns
+"""
+from enum import Enum
+import math
+import numpy as np
+from AbstractDescriptorModel import DescriptorModelItem
+
+
+class IntItem(DescriptorModelItem):
+    """Stores a Python int.  Floats are rounded to the nearest integer and results outside of
+    minimum..maximum are clamped"""
+    dtype = np.int64
+
+    def __init__(self, initialVal=0, minimum=None, maximum=None, equals=None):
+        self.coerce = _clamped(_toInt, minimum, maximum)
+        self.minimum = None if minimum is None else _toInt(minimum)
+        self.maximum = None if maximum is None else _toInt(maximum)
+        super().__init__(self.coerce(initialVal), equals=equals)
+
+    def coerceArray(self, values):
+        values = np.asarray(values)
+        kind = values.dtype.kind
+        if kind in 'biu':
+            values = values.astype(np.int64)
+        elif kind == 'f':
+            if not np.isfinite(values).all():
+                raise ValueError('non finite values can not be stored as ints')
+            values = np.rint(values).astype(np.int64)
+        else:
+            return _each(self.coerce, values, np.int64)
+        return _clip(values, self.minimum, self.maximum)
+
+
+class FloatItem(DescriptorModelItem):
+    """Stores a Python float.  Values outside of minimum..maximum are clamped"""
+    dtype = np.float64
+
+    def __init__(self, initialVal=0.0, minimum=None, maximum=None, equals=None, tolerance=None):
+        self.coerce = _clamped(_toFloat, minimum, maximum)
+        self.minimum = None if minimum is None else _toFloat(minimum)
+        self.maximum = None if maximum is None else _toFloat(maximum)
+        super().__init__(self.coerce(initialVal), equals=equals, tolerance=tolerance)
+
+    def coerceArray(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind not in 'biuf':
+            return _each(self.coerce, values, np.float64)
+        return _clip(values.astype(np.float64), self.minimum, self.maximum)
+
+
+class BoolItem(DescriptorModelItem):
+    """Stores a Python bool.  Only bools and integers are accepted, strings such as 'false' are rejected"""
+    dtype = np.bool_
+
+    def __init__(self, initialVal=False, equals=None):
+        self.coerce = _toBool
+        super().__init__(self.coerce(initialVal), equals=equals)
+
+    def coerceArray(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind not in 'biu':
+            return _each(self.coerce, values, np.bool_)
+        return values.astype(np.bool_)
+
+
+class EnumItem(DescriptorModelItem):
+    """Stores one of a fixed set of choices.  choices is either a sequence of allowed values or an Enum class,
+    in which case members may also be written by name or by value.  The default is the first choice"""
+
+    def __init__(self, choices, initialVal=None, equals=None):
+        if isinstance(choices, type) and issubclass(choices, Enum):
+            lookup = {}
+            for member in choices:
+                lookup[member] = lookup[member.name] = lookup[member.value] = member
+            choices = list(choices)
+        else:
+            choices = list(choices)
+            lookup = {choice: choice for choice in choices}
+        if not choices:
+            raise ValueError('EnumItem needs at least one choice')
+        self.choices = tuple(choices)
+
+        def coerce(val):
+            try:
+                return lookup[val]
+            except (KeyError, TypeError):
+                raise ValueError(f'{val!r} is not one of {self.choices}') from None
+        self.coerce = coerce
+        super().__init__(self.coerce(choices[0] if initialVal is None else initialVal), equals=equals)
+
+
+class ArrayItem(DescriptorModelItem):
+    """Stores a NumPy array of the given dtype.  shape may use None for dimensions of any length.  Values are
+    converted with np.asarray so arrays which already have the right dtype are stored without a copy"""
+
+    def __init__(self, dtype, shape, initialVal=None, equals=None):
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+
+        def coerce(val):
+            val = np.asarray(val, dtype=self.dtype)
+            if val.ndim != len(self.shape) or any(n is not None and n != m for n, m in zip(self.shape, val.shape)):
+                raise ValueError(f'expected an array of shape {self.shape} but got {val.shape}')
+            return val
+        self.coerce = coerce
+        if initialVal is None:
+            initialVal = np.zeros(tuple(0 if n is None else n for n in self.shape), dtype=self.dtype)
+        super().__init__(self.coerce(initialVal), equals=equals)
+
+    def dataValue(self, obj):
+        # views get a read only view, the stored array may be shared (e.g. the class default)
+        view = self.__get__(obj).view()
+        view.flags.writeable = False
+        return view
+
+
+def _toInt(val):
+    if isinstance(val, (str, bytes)):
+        raise TypeError(f'expected a number but got {val!r}')
+    if isinstance(val, (float, np.floating)):
+        if not math.isfinite(val):
+            raise ValueError(f'{val!r} can not be stored as an int')
+        return int(round(val))
+    return int(val)
+
+
+def _toFloat(val):
+    if isinstance(val, (str, bytes)):
+        raise TypeError(f'expected a number but got {val!r}')
+    return float(val)
+
+
+def _toBool(val):
+    if val is True or val is False:
+        return val
+    if isinstance(val, (int, np.integer, np.bool_)):
+        return bool(val)
+    raise TypeError(f'expected a bool but got {val!r}')
+
+
+def _clamped(convert, minimum, maximum):
+    # pick the cheapest converter for the bounds actually given, so nothing is tested at write time needlessly
+    minimum = None if minimum is None else convert(minimum)
+    maximum = None if maximum is None else convert(maximum)
+    if minimum is None and maximum is None:
+        return convert
+    if maximum is None:
+        return lambda val: max(convert(val), minimum)
+    if minimum is None:
+        return lambda val: min(convert(val), maximum)
+    if minimum > maximum:
+        raise ValueError('minimum must not be greater than maximum')
+    return lambda val: min(max(convert(val), minimum), maximum)
+
+
+def _each(coerce, values, dtype):
+    # anything NumPy can't convert in one go (strings, objects) goes through the scalar coerce, which raises
+    # the same errors a single write would
+    return np.array([coerce(val) for val in values.ravel().tolist()], dtype=dtype).reshape(values.shape)
+
+
+def _clip(values, minimum, maximum):
+    if minimum is None and maximum is None:
+        return values
+    return np.clip(values, minimum, maximum)
@@ -0,0 +1,133 @@
+"""Running the simulation on its own thread, decoupled from rendering.
+
+BackgroundRunner steps an Engine's PlanetState at a fixed rate on a worker thread and publishes the planet
+positions after every frame into a TripleBuffer.  The gui samples the newest frame whenever it paints, so a
+slow paint never slows the simulation down and a slow step never blocks the gui.
+
+The worker never touches Qt models.  Star coordinates and the control values are copied on the gui thread
+whenever they change and handed over as one immutable snapshot, which the worker picks up between steps.
+Anything else that changes the planets (reset, reversing time) is queued and also run between steps.
+"""
+from queue import SimpleQueue, Empty
+from time import perf_counter
+import threading
+import numpy as np
+
+
+class TripleBuffer:
+    """Single writer, single reader frame exchange without locks.  The writer fills one slot while the
+    reader holds another and the third holds the newest finished frame.  Slot indices are swapped with plain
+    attribute assignments, which are atomic in CPython, and each side re-checks the other's claim after
+    making its own, so the reader never sees a frame that is being written"""
+
+    def __init__(self):
+        self._slots = [np.empty((2, 0)), np.empty((2, 0)), np.empty((2, 0))]
+        self._published = 0
+        self._reading = 0
+        self._writing = None
+        self.frames = 0          # number of frames published so far
+
+    def publish(self, positions):
+        """Copy positions, a (2, N) array, into a free slot and make it the newest frame"""
+        while True:
+            index = ({0, 1, 2} - {self._published, self._reading}).pop()
+            self._writing = index
+            if self._reading != index:
+                break
+        slot = self._slots[index]
+        if slot.shape != positions.shape or slot.dtype != positions.dtype:
+            slot = self._slots[index] = np.empty_like(positions)
+        np.copyto(slot, positions)
+        self._published = index
+        self._writing = None
+        self.frames += 1
+
+    def read(self):
+        """The newest finished frame.  It stays valid until the next call to read"""
+        while True:
+            index = self._published
+            self._reading = index
+            if self._writing != index:
+                return self._slots[index]
+
+
+class BackgroundRunner:
+    """Steps engine.planets on a worker thread.  Every 1/framesPerSecond seconds the worker advances the
+    simulation by dt in substeps equal steps and publishes the positions to buffer.  When the worker falls
+    more than maxLag seconds behind it skips ahead instead of trying to catch up"""
+
+    def __init__(self, engine, dt=0.005, framesPerSecond=62.5, substeps=1, maxLag=0.25):
+        self.engine = engine
+        self.dt = dt
+        self.framesPerSecond = framesPerSecond
+        self.substeps = substeps
+        self.maxLag = maxLag
+        self.buffer = TripleBuffer()
+        self._commands = SimpleQueue()
+        self._parameters = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        engine.controlModel.dataChanged.connect(self.updateParameters)
+        for signal in (engine.stars.dataChanged, engine.stars.rowsInserted, engine.stars.rowsRemoved,
+                       engine.stars.modelReset):
+            signal.connect(self.updateParameters)
+        self.updateParameters()
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.isRunning():
+            return
+        self._stop.clear()
+        self.buffer.publish(self.engine.planets.positions)
+        self._thread = threading.Thread(target=self._run, name='BackgroundRunner', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._applyCommands()     # whatever was queued last still takes effect
+
+    def call(self, func):
+        """Run func on the worker between two steps, or right away when the worker isn't running"""
+        if self.isRunning():
+            self._commands.put(func)
+        else:
+            func()
+
+    def updateParameters(self, *args):
+        # runs on the gui thread whenever a star or a control value changes
+        engine = self.engine
+        self._parameters = (engine.stars.column('x').copy(), engine.stars.column('y').copy(),
+                            engine.controlModel.k, engine.controlModel.k_pow, engine.starGeneration)
+
+    def _applyCommands(self):
+        while True:
+            try:
+                func = self._commands.get_nowait()
+            except Empty:
+                return
+            func()
+
+    def _run(self):
+        planets = self.engine.planets
+        period = 1 / self.framesPerSecond
+        due = perf_counter()
+        while not self._stop.is_set():
+            self._applyCommands()
+            sx, sy, k, k_pow, generation = self._parameters
+            if len(planets):
+                dt = self.dt / self.substeps
+                for _ in range(self.substeps):
+                    planets.step(dt, sx, sy, k, k_pow, generation)
+            self.buffer.publish(planets.positions)
+
+            due += period
+            now = perf_counter()
+            if now - due > self.maxLag:
+                due = now
+            self._stop.wait(max(0.0, due - now))
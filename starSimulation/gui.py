@@ -1,15 +1,14 @@
-from qtpy.QtGui import QColor, QPen
-from qtpy.QtCore import Qt
-from qtpy.QtWidgets import QGraphicsEllipseItem, QGraphicsItem, QWidget, QVBoxLayout, QHBoxLayout, QScrollArea, QSizePolicy
+from qtpy.QtGui import QColor
+from qtpy.QtWidgets import QGraphicsEllipseItem, QGraphicsItem, QWidget, QVBoxLayout, QHBoxLayout, QSizePolicy
 from pyqtgraph import GraphicsLayoutWidget, ScatterPlotItem
 import numpy as np
-from functools import partial
-from widgets import ControlWidget, StarWidget
+from widgets import ControlWidget, StarListWidget
+from PaletteService import palettes
 
 
 class StarItem(QGraphicsEllipseItem):
-    def __init__(self, starModel):
-        self.starModel = starModel
+    def __init__(self, star):
+        self.star = star
         size = 10
         super().__init__(-size/2, -size/2, size, size)
         self.setPen(QColor(148, 32, 25))
@@ -20,29 +19,19 @@ class StarItem(QGraphicsEllipseItem):
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionHasChanged:
-            # when our position changes update the model
-            self.starModel.x = int(value.x())
-            self.starModel.y = int(value.y())
+            # when our position changes update the model.  setMany notifies views once for both coordinates
+            self.star.setMany(x=int(value.x()), y=int(value.y()))
         return super().itemChange(change, value)
 
 
 class MainGui(QWidget):
-    @staticmethod
-    def rainbowColor(a):
-        """Returns a color on the 'rainbow' spectrum where a is expected to be between 0 and 1"""
-        x = a * 5
-        red = 255 if x < 2 else ( 255 * ( 3 - x ) if x < 3 else (0 if x < 4 else 120 * (5 - x)))
-        green = 120 * x if x < 2 else (240 if x < 3 else (240 * ( 4 - x ) if x < 4 else 0))
-        blue = 0 if x < 2 else ( 30 * ( 3 - x) if x < 3 else (30 + 225 * ( 4 - x) if x < 4 else 255))
-        return red, green, blue
-
     def __init__(self, engine, controlModel):
         super().__init__()
         self.engine = engine
         self.controlModel = controlModel
         self.rainbowPen = None
         self.rainbowBrush = None
-        self.starMap = {}  # an internal map from starModels to (guiWidget, item)
+        self.starMap = {}  # an internal map from star rows to their graphics items
 
         # setup subscriptions for adding stars
         self.engine.sigNewStar.connect(self.addStar)
@@ -61,18 +50,10 @@ class MainGui(QWidget):
         # create widgets for controls and stars
         self.controlLayout = QVBoxLayout()
         self.controlLayout.addWidget(ControlWidget(controlModel, engine), 0)
-        self.starLayout = QVBoxLayout()
-        self.starLayout.addStretch(0) # we'll keep this stretch at the end so widgets float to top of layout
+        self.starListWidget = StarListWidget(engine.stars)   # only creates widgets for the visible stars
+        self.starListWidget.sigDeleteStar.connect(self.engine.deleteStar)
+        self.controlLayout.addWidget(self.starListWidget)
         self.engine.addStar()
-        self.starListWidget = QWidget()
-        self.starListWidget.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Preferred)
-        self.starListWidget.setLayout(self.starLayout)
-        self.starScrollArea = QScrollArea()
-        self.starScrollArea.setWidget(self.starListWidget)
-        self.starScrollArea.setWidgetResizable(True)
-        self.starScrollArea.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Preferred)
-        self.starScrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.controlLayout.addWidget(self.starScrollArea)
 
         # and now the main layout
         mainLayout = QHBoxLayout()
@@ -82,34 +63,30 @@ class MainGui(QWidget):
         self.setLayout(mainLayout)
 
     def buildColorPalette(self, N):
-        colors = [self.rainbowColor(i/N) for i in range(N)]
-        self.rainbowBrush = [QColor(*c) for c in colors]
-        self.rainbowPen = [QPen(b) for b in self.rainbowBrush]
+        # computed in one go with NumPy and cached, so resetting to the same number of planets is free
+        self.rainbowBrush, self.rainbowPen = palettes.brushesAndPens('rainbow', N)
 
     def addStar(self, star):
-        starWidget = StarWidget(star)          # this is the gui controls for the star
-        starWidget.delete.clicked.connect(partial(self.engine.deleteStar, star))
+        # the star's controls show up in starListWidget by themselves once it scrolls into view
         starItem = StarItem(star)              # this is the QGraphicsItem for displaying the star
-        self.starMap[star] = (starWidget, starItem)
-        self.starLayout.insertWidget(self.starLayout.count()-1, starWidget)
+        self.starMap[star] = starItem
         self.view.addItem(starItem)
 
     def deleteStar(self, star):
-        starWidget, starItem = self.starMap[star]
-        starWidget.hide()
-        starWidget.deleteLater()
-        starItem.hide()
+        starItem = self.starMap[star]
+        self.view.removeItem(starItem)
         del starItem
         del self.starMap[star]
 
     def updatePlanets(self):
-        if len(self.engine.px):
+        x, y = self.engine.frame()   # the newest frame, or views into the engine's state when not in the background
+        if len(x):
             color = (90, 120, 150)   # a nice pale bluish color
-            x = self.engine.px
-            y = self.engine.py
             if self.controlModel.rainbow:
-                v = np.sqrt(np.power(x, 2) + np.power(y, 2))
-                s = np.argsort(v)
+                if self.rainbowPen is None or len(self.rainbowPen) != len(x):
+                    # a frame drawn before the queued sigResetPlanets arrived.  Palettes are cached so this is cheap
+                    self.buildColorPalette(len(x))
+                s = np.argsort(np.hypot(x, y))
                 self.plot.setData(x=x[s], y=y[s], symbol='o', pen=self.rainbowPen, brush=self.rainbowBrush, size=1)
             else:
                 self.plot.setData(x=x, y=y, symbol='o', pen=color, brush=color, size=2)
@@ -1,25 +1,26 @@
-from AbstractDescriptorModel import AbstractDescriptorModel, DescriptorModelItem
+from AbstractDescriptorModel import AbstractDescriptorModel
+from TypedModelItems import IntItem, FloatItem, BoolItem
 
 
 # This holds 'Star' data which is just the star position.  To use DescriptorModelItem, you just
 # put instances in at class level.  DescriptorModelItem is a descriptor which will allow for access
-# via dot syntax as seen below in the __init__ function.
+# via dot syntax as seen below in the __init__ function.  The engine keeps all of its stars in a
+# DescriptorTableModel which uses StarModel as the schema for its rows.
 class StarModel(AbstractDescriptorModel):
-    x = DescriptorModelItem()
-    y = DescriptorModelItem()
+    x = FloatItem()
+    y = FloatItem()
 
     def __init__(self, x, y):
         super().__init__()
-        self.x = x
-        self.y = y
+        self.setMany(x=x, y=y)
 
 
 # and here is the main control data.  We won't even use an __init__ with this one and instead
 # will just initialize at the class level by supplying the optional initialization argument to
-# DescriptorModelItem.
+# the items.  The typed items convert whatever the sliders commit, e.g. numPlanets is always an int.
 class ControlModel(AbstractDescriptorModel):
-    k = DescriptorModelItem(0.01)
-    k_pow = DescriptorModelItem(1.5)
-    numPlanets = DescriptorModelItem(250)
-    rainbow = DescriptorModelItem(False)
+    k = FloatItem(0.01, minimum=0)
+    k_pow = FloatItem(1.5)
+    numPlanets = IntItem(250, minimum=0)
+    rainbow = BoolItem(False)
 
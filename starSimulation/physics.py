@@ -0,0 +1,434 @@
+"""The planets' state and the force kernel of the star simulation.  Every star pulls every planet towards
+itself with a Hooke like force k * d * r**(k_pow - 1), where d is the vector from planet to star and r its
+length.
+
+All stars are handled in one broadcast (stars x planets) pass.  Writing w for r**(k_pow - 1), the sum over
+stars of w * (sx - px) is (sx . w) - px * sum(w), so after building the weights one matrix product gives
+both components of the acceleration.  Planets are processed in chunks of at most maxElements pairs so the
+temporaries stay small enough to live in cache, no matter how big the scene is.
+
+For scale: one float64 step of 100 stars x 100k planets measured about 80 ms at k_pow 1.5, which takes two
+square roots per pair, and about 100 ms at other powers such as 1.7, which need np.power.  A float32
+PlanetState roughly halves both.
+
+PlanetState.setWorkers(n) integrates contiguous ranges of planets on a thread pool; NumPy releases the GIL
+inside the ufuncs and the matrix product.  The ranges are made of whole kernel chunks, which depend only on
+the number of stars, so every planet goes through exactly the same operations as in serial mode and the
+results are bit for bit identical for any number of workers.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class PlanetState:
+    """Positions and velocities of all planets in one contiguous (4, N) buffer with rows px, py, vx, vy, plus
+    the scratch space step needs, so a time step allocates nothing.  px, py, vx and vy, as well as positions
+    (rows px, py) and velocities (rows vx, vy), are views into the buffer.  dtype may be np.float32 to halve
+    the memory traffic at the cost of precision.
+
+    Steps are taken by an Integrator (SymplecticEuler by default, see setIntegrator).  With an AdaptiveStep
+    controller (see setAdaptive) every step is split into as many substeps as the current accelerations need"""
+    minChunksPerWorker = 2       # smaller scenes aren't worth handing to another thread
+
+    def __init__(self, n=0, dtype=np.float64, workers=1, integrator=None):
+        self.dtype = np.dtype(dtype)
+        self._pool = None
+        self.integrator = SymplecticEuler() if integrator is None else integrator
+        self.adaptive = None
+        self.resize(n)
+        self.setWorkers(workers)
+
+    def setWorkers(self, workers):
+        """Integrate on up to workers threads.  1 runs everything on the calling thread"""
+        workers = max(1, int(workers))
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if workers > 1:
+            self._pool = ThreadPoolExecutor(workers, thread_name_prefix='PlanetState')
+        self.workers = workers
+        self.workspaces = [Workspace(self.dtype) for _ in range(workers)]
+
+    def setIntegrator(self, integrator):
+        self.integrator = integrator
+        integrator.prepare(self)
+
+    def setAdaptive(self, adaptive):
+        """An AdaptiveStep, or None to always take one step per call to step"""
+        self.adaptive = adaptive
+
+    def __len__(self):
+        return self.buffer.shape[1]
+
+    def resize(self, n):
+        """Make room for n planets.  Contents are undefined afterwards"""
+        self.buffer = np.zeros((4, n), dtype=self.dtype)
+        self.scratch = np.empty((2, n), dtype=self.dtype)
+        self.norms = np.empty(n, dtype=self.dtype)
+        self.positions = self.buffer[:2]
+        self.velocities = self.buffer[2:]
+        self.px, self.py, self.vx, self.vy = self.buffer
+        self.integrator.prepare(self)
+
+    def reset(self, n, x, y, std, rng):
+        """Draw n planets from a gaussian around x, y with zero velocity"""
+        if n != len(self):
+            self.resize(n)
+        rng.standard_normal(out=self.positions, dtype=self.dtype)
+        self.positions *= std
+        self.px += x
+        self.py += y
+        self.velocities.fill(0)
+        self.integrator.invalidate()
+
+    def reverse(self):
+        """Reverse time.  Under the symplectic integrators with a fixed step the planets retrace their paths"""
+        self.velocities *= -1
+        self.integrator.reversed()
+
+    def step(self, dt, sx, sy, k, k_pow, generation=None):
+        """Elapse time by dt with the planets accelerated towards the stars at sx, sy.  generation, when given,
+        must change whenever sx or sy change, so integrators which cache accelerations needn't compare them"""
+        if not len(self):
+            return
+        force = (sx, sy, k, k_pow)
+        self.integrator.begin(self, force, generation)
+        substeps = 1 if self.adaptive is None else self.adaptive.substeps(self, dt, force)
+        for _ in range(substeps):
+            self._substep(dt / substeps, force)
+            self.integrator.end()
+
+    def acceleration(self, force):
+        """The accelerations at the current positions as a (2, N) array.  It may be scratch space which the
+        next step overwrites"""
+        current = self.integrator.currentAcceleration()
+        if current is None:
+            current = hookeAcceleration(self.px, self.py, *force, out=self.scratch, workspace=self.workspaces[0])
+        return current
+
+    def parallelParts(self, nStars):
+        """The number of ranges a step with nStars stars is split into.  1 means the pool isn't used"""
+        return max(1, min(self.workers, len(self) // (kernelChunk(nStars) * self.minChunksPerWorker)))
+
+    def _substep(self, dt, force):
+        n = len(self)
+        chunk = kernelChunk(len(force[0]))
+        parts = self.parallelParts(len(force[0]))
+        if parts == 1:
+            self.integrator.stepRange(self, 0, n, dt, _Accelerator(force, self.workspaces[0]))
+            return
+        # split on chunk boundaries so each part runs the same kernel chunks as the serial loop would
+        perPart = -(-n // chunk // parts) * chunk
+        futures = [self._pool.submit(self.integrator.stepRange, self, start, min(start + perPart, n), dt,
+                                     _Accelerator(force, workspace))
+                   for start, workspace in zip(range(0, n, perPart), self.workspaces)]
+        for future in futures:
+            future.result()
+
+
+class _Accelerator:
+    # computes accelerations for slices of the state with one worker's workspace
+    __slots__ = ('force', 'workspace')
+
+    def __init__(self, force, workspace):
+        self.force = force
+        self.workspace = workspace
+
+    def __call__(self, positions, out):
+        sx, sy, k, k_pow = self.force
+        return hookeAcceleration(positions[0], positions[1], sx, sy, k, k_pow, out=out, workspace=self.workspace)
+
+
+class Integrator:
+    """Advances the planets in state[start:stop] by dt.  accel(positions, out) writes the accelerations at a
+    (2, n) slice of positions into out.  Integrators keep whatever per planet buffers they need, sized in
+    prepare, so that stepping allocates nothing.  Each planet only depends on itself, which is what lets
+    PlanetState step ranges of planets on different threads"""
+
+    def prepare(self, state):
+        pass
+
+    def invalidate(self):
+        """The positions were changed from outside, cached values are no longer valid"""
+
+    def begin(self, state, force, generation=None):
+        """Called at the start of every PlanetState.step with the force parameters and the stars' generation,
+        see PlanetState.step"""
+
+    def end(self):
+        """Called after every substep once all ranges are done"""
+
+    def reversed(self):
+        """The velocities were just negated"""
+
+    def currentAcceleration(self):
+        """The acceleration at the current positions if the integrator has it at hand, otherwise None"""
+        return None
+
+    def stepRange(self, state, start, stop, dt, accel):
+        raise NotImplementedError
+
+
+class SymplecticEuler(Integrator):
+    """First order and symplectic: drift with the old velocity, then kick with the acceleration at the new
+    position.  After time is reversed the adjoint order (kick, then drift) is used, which makes the planets
+    retrace their steps exactly up to rounding"""
+
+    def __init__(self):
+        self._kickFirst = False
+
+    def reversed(self):
+        self._kickFirst = not self._kickFirst
+
+    def stepRange(self, state, start, stop, dt, accel):
+        scratch = state.scratch[:, start:stop]
+        positions = state.positions[:, start:stop]
+        velocities = state.velocities[:, start:stop]
+        if self._kickFirst:
+            accel(positions, scratch)
+            scratch *= dt
+            velocities += scratch
+        np.multiply(velocities, dt, out=scratch)
+        positions += scratch
+        if not self._kickFirst:
+            accel(positions, scratch)
+            scratch *= dt
+            velocities += scratch
+
+
+class Leapfrog(Integrator):
+    """Velocity Verlet (kick, drift, kick): second order, symplectic and time reversible.  The acceleration
+    at the end of a step is kept for the start of the next one, so a step costs one force evaluation like
+    SymplecticEuler does.  The cache is refreshed whenever the stars or the force parameters change"""
+
+    def __init__(self):
+        self.accelerations = np.empty((2, 0))
+        self._key = None
+        self._stale = True
+
+    def prepare(self, state):
+        self.accelerations = np.empty((2, len(state)), dtype=state.dtype)
+        self.invalidate()
+
+    def invalidate(self):
+        self._key = None
+        self._stale = True
+
+    def begin(self, state, force, generation=None):
+        sx, sy, k, k_pow = force
+        key = self._key
+        if key is not None and key[2] == k and key[3] == k_pow:
+            if generation is not None:
+                if key[4] == generation:
+                    return
+            elif np.array_equal(key[0], sx) and np.array_equal(key[1], sy):
+                return
+        # without a generation the stars have to be kept and compared on every step
+        self._key = (None, None, k, k_pow, generation) if generation is not None else \
+            (np.array(sx), np.array(sy), k, k_pow, None)
+        self._stale = True
+
+    def end(self):
+        self._stale = False
+
+    def currentAcceleration(self):
+        return None if self._stale else self.accelerations
+
+    def stepRange(self, state, start, stop, dt, accel):
+        scratch = state.scratch[:, start:stop]
+        positions = state.positions[:, start:stop]
+        velocities = state.velocities[:, start:stop]
+        accelerations = self.accelerations[:, start:stop]
+        if self._stale:
+            accel(positions, accelerations)
+        np.multiply(accelerations, dt / 2, out=scratch)
+        velocities += scratch
+        np.multiply(velocities, dt, out=scratch)
+        positions += scratch
+        accel(positions, accelerations)
+        np.multiply(accelerations, dt / 2, out=scratch)
+        velocities += scratch
+
+
+class RK4(Integrator):
+    """Classic fourth order Runge-Kutta.  Very accurate for smooth orbits but neither symplectic nor time
+    reversible, and it costs four force evaluations per step"""
+
+    def __init__(self):
+        self._buffers = np.empty((10, 0))
+
+    def prepare(self, state):
+        self._buffers = np.empty((10, len(state)), dtype=state.dtype)
+
+    def stepRange(self, state, start, stop, dt, accel):
+        positions = state.positions[:, start:stop]
+        velocities = state.velocities[:, start:stop]
+        buffers = self._buffers[:, start:stop]
+        total, xt, kx, kv = buffers[0:4], buffers[4:6], buffers[6:8], buffers[8:10]
+        totalX, totalV = total[:2], total[2:]
+
+        accel(positions, kv)                                    # k1: (v, a(x))
+        totalX[...] = velocities
+        totalV[...] = kv
+        np.multiply(velocities, dt / 2, out=xt)                 # k2: (v + dt/2 k1v, a(x + dt/2 k1x))
+        xt += positions
+        np.multiply(kv, dt / 2, out=kx)
+        kx += velocities
+        accel(xt, kv)
+        self._addTwice(kx, kv, total, xt)
+        np.multiply(kx, dt / 2, out=xt)                         # k3: (v + dt/2 k2v, a(x + dt/2 k2x))
+        xt += positions
+        np.multiply(kv, dt / 2, out=kx)
+        kx += velocities
+        accel(xt, kv)
+        self._addTwice(kx, kv, total, xt)
+        np.multiply(kx, dt, out=xt)                             # k4: (v + dt k3v, a(x + dt k3x))
+        xt += positions
+        np.multiply(kv, dt, out=kx)
+        kx += velocities
+        accel(xt, kv)
+        totalX += kx
+        totalV += kv
+
+        total *= dt / 6
+        positions += totalX
+        velocities += totalV
+
+    @staticmethod
+    def _addTwice(kx, kv, total, spare):
+        # total += 2 * (kx, kv), using spare, which is free at this point, instead of a temporary
+        np.multiply(kx, 2, out=spare)
+        total[:2] += spare
+        np.multiply(kv, 2, out=spare)
+        total[2:] += spare
+
+
+class AdaptiveStep:
+    """Chooses the number of substeps for each PlanetState.step from the largest acceleration: substeps are
+    at most eta * sqrt(lengthScale / max|a|) long, and there are never more than maxSubsteps of them.  Calm
+    scenes then get by with one long step while stiff ones (large k, k_pow near 3) are subdivided.  Reversing
+    time is only approximate with adaptive steps, since the step sizes depend on where a step starts"""
+
+    def __init__(self, eta=0.05, lengthScale=1.0, maxSubsteps=64):
+        self.eta = eta
+        self.lengthScale = lengthScale
+        self.maxSubsteps = maxSubsteps
+        self.lastSubsteps = 1
+
+    def substeps(self, state, dt, force):
+        accelerations = state.acceleration(force)
+        np.hypot(accelerations[0], accelerations[1], out=state.norms)
+        largest = float(state.norms.max())
+        if largest > 0 and np.isfinite(largest):
+            limit = self.eta * (self.lengthScale / largest) ** 0.5
+            self.lastSubsteps = int(min(self.maxSubsteps, max(1, -(-abs(dt) // limit))))
+        else:
+            self.lastSubsteps = self.maxSubsteps if largest > 0 else 1
+        return self.lastSubsteps
+
+
+INTEGRATORS = {
+    'symplecticEuler': SymplecticEuler,
+    'leapfrog': Leapfrog,
+    'rk4': RK4,
+}
+
+
+class Workspace:
+    """Scratch buffers for hookeAcceleration.  They grow when needed and are reused afterwards"""
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._stars = np.empty((3, 0), dtype=self.dtype)
+        self._pairs = np.empty((2, 0), dtype=self.dtype)
+        self._sums = np.empty(0, dtype=self.dtype)
+
+    def stars(self, nStars):
+        if self._stars.shape[1] != nStars:
+            self._stars = np.empty((3, nStars), dtype=self.dtype)
+        return self._stars
+
+    def pairs(self, size):
+        # two flat buffers of at least size elements for the weights and the second distance component
+        if self._pairs.shape[1] < size:
+            self._pairs = np.empty((2, size), dtype=self.dtype)
+        return self._pairs
+
+    def sums(self, size):
+        if len(self._sums) < size:
+            self._sums = np.empty(size, dtype=self.dtype)
+        return self._sums
+
+
+def kernelChunk(nStars, maxElements=1 << 14):
+    """The number of planets hookeAcceleration handles at once for nStars stars"""
+    return max(1, maxElements // max(1, nStars))
+
+
+def hookeAcceleration(px, py, sx, sy, k, k_pow, maxElements=1 << 14, out=None, workspace=None):
+    """Return the accelerations (ax, ay) of planets at px, py caused by stars at sx, sy.  The result has the
+    dtype of px and is written into out, a (2, N) array, when given.  Passing the same workspace on every
+    call avoids allocating scratch space"""
+    px = np.asarray(px)
+    py = np.asarray(py)
+    if out is None:
+        out = np.empty((2, len(px)), dtype=px.dtype)
+    if workspace is None:
+        workspace = Workspace(px.dtype)
+    ax, ay = out
+    nStars = len(sx)
+    if nStars == 0 or len(px) == 0:
+        out.fill(0)
+        return out
+
+    if k_pow == 1:
+        # the force doesn't depend on r, so the sum over stars collapses to the stars' centroid
+        np.multiply(px, -nStars * k, out=ax)
+        ax += k * float(np.sum(sx))
+        np.multiply(py, -nStars * k, out=ay)
+        ay += k * float(np.sum(sy))
+        return out
+
+    stars = workspace.stars(nStars)      # one product gives sx . w, sy . w and sum(w)
+    stars[0] = sx
+    stars[1] = sy
+    stars[2] = 1
+    sx = stars[0, :, None]
+    sy = stars[1, :, None]
+    chunk = kernelChunk(nStars, maxElements)
+    w, d = workspace.pairs(nStars * min(chunk, len(px)))
+    sums = workspace.sums(3 * min(chunk, len(px)))
+    for start in range(0, len(px), chunk):
+        stop = min(start + chunk, len(px))
+        n = stop - start
+        # reshaping the front of the flat buffers keeps every chunk contiguous, which np.dot needs for out
+        cw, cd, s = w[:nStars * n].reshape(nStars, n), d[:nStars * n].reshape(nStars, n), sums[:3 * n].reshape(3, n)
+        cpx, cpy, cax, cay = px[start:stop], py[start:stop], ax[start:stop], ay[start:stop]
+        np.subtract(sx, cpx, out=cw)
+        np.multiply(cw, cw, out=cw)
+        np.subtract(sy, cpy, out=cd)
+        np.multiply(cd, cd, out=cd)
+        cw += cd
+        _hookeWeight(cw, k_pow)
+        np.dot(stars, cw, out=s)
+        np.multiply(cpx, s[2], out=cax)
+        np.subtract(s[0], cax, out=cax)
+        np.multiply(cpy, s[2], out=cay)
+        np.subtract(s[1], cay, out=cay)
+
+    out *= k
+    return out
+
+
+def _hookeWeight(r2, k_pow):
+    # r2 = r**2 becomes r**(k_pow - 1) in place.  The common powers get by without np.power
+    if k_pow == 1.5:
+        np.sqrt(r2, out=r2)
+        np.sqrt(r2, out=r2)
+    elif k_pow == 2:
+        np.sqrt(r2, out=r2)
+    elif k_pow == 3:
+        pass
+    else:
+        np.power(r2, (k_pow - 1) / 2, out=r2)
+    return r2
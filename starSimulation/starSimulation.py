@@ -3,6 +3,7 @@ of the Qt model view architecture
 """
 import sys
 import os
+from functools import partial
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lib'))
 os.environ['QT_API'] = 'pyqt5'
@@ -10,9 +11,11 @@ os.environ['PYQTGRAPH_QT_LIB'] = 'PyQt5'
 
 from qtpy.QtWidgets import QApplication
 from qtpy.QtCore import QTimer, Signal, QObject
-import qdarkstyle
 import numpy as np
+from DescriptorTableModel import DescriptorTableModel
 from models import StarModel, ControlModel
+from physics import PlanetState, AdaptiveStep, INTEGRATORS
+from background import BackgroundRunner
 from gui import MainGui
 
 
@@ -21,63 +24,114 @@ class Engine(QObject):
     sigDeleteStar = Signal(object)   # signals that a star has gone away
     sigResetPlanets = Signal(object)  # object = numPlanets.
 
-    def __init__(self, controlModel):
+    def __init__(self, controlModel, dtype=np.float64, workers=1, integrator='symplecticEuler'):
         super().__init__()
         self.controlModel = controlModel
 
-        # planet positions
-        self.px = np.array([])
-        self.py = np.array([])
-        self.vx = np.array([])
-        self.vy = np.array([])
+        # planet positions and velocities.  Pass dtype=np.float32 for big scenes where precision matters less
+        # and workers > 1 to integrate big scenes on several cores (see PlanetState.setWorkers)
+        self.planets = PlanetState(0, dtype, workers, INTEGRATORS[integrator]())
+        self.rng = np.random.default_rng()
 
-        self.stars = []
+        # all stars live in one table model with a row per star.  Rows are StarModel shaped records
+        self.stars = DescriptorTableModel(StarModel)
+        # counts changes to the stars so integrators can tell whether they moved without comparing positions
+        self.starGeneration = 0
+        for signal in (self.stars.dataChanged, self.stars.rowsInserted, self.stars.rowsRemoved,
+                       self.stars.modelReset):
+            signal.connect(self._starsChanged)
+
+        self.runner = None       # a BackgroundRunner while the simulation runs on its own thread
+
+    def _starsChanged(self, *args):
+        self.starGeneration += 1
 
     def addStar(self):
-        star = StarModel(0, 0)
-        self.stars.append(star)
+        star = self.stars.appendRow(x=0, y=0)
         self.sigNewStar.emit(star)
+        return star
 
     def deleteStar(self, star):
-        self.stars.remove(star)
+        self.stars.removeRow(star.row())
         self.sigDeleteStar.emit(star)
 
     def resetPlanets(self, x, y, std=50):
         """get rid of current planets and draw a new set with a gaussian distribution centered about x, y
         with zero velocity
         """
-        N = int(self.controlModel.numPlanets)
+        N = self.controlModel.numPlanets    # IntItem, so this is always an int
 
-        self.px = np.random.normal(x, 50, N)
-        self.py = np.random.normal(y, 50, N)
-        self.vx = np.full(N, 0.0)
-        self.vy = np.full(N, 0.0)
+        self._modify(partial(self._resetPlanets, N, x, y, std))
+
+    def _resetPlanets(self, N, x, y, std):
+        self.planets.reset(N, x, y, std, self.rng)
+        # only announced once the planets really changed.  From the worker thread this is queued to the gui
         self.sigResetPlanets.emit(N)
 
+    def startBackground(self, dt=0.005, framesPerSecond=62.5, substeps=1):
+        """Step the simulation on a worker thread at a fixed rate instead of calling step.  Use frame to get
+        the planet positions to draw while it runs"""
+        if self.runner is None:
+            self.runner = BackgroundRunner(self, dt, framesPerSecond, substeps)
+        self.runner.start()
+
+    def stopBackground(self):
+        if self.runner is not None:
+            self.runner.stop()
+
+    def frame(self):
+        """(2, N) array of planet x and y positions to draw.  While running in the background this is the
+        newest finished frame, otherwise it is a view of the live state"""
+        if self.runner is not None and self.runner.isRunning():
+            return self.runner.buffer.read()
+        return self.planets.positions
+
+    def _modify(self, func):
+        # changes to the planet state have to wait for the end of a step when a worker thread is stepping
+        if self.runner is not None:
+            self.runner.call(func)
+        else:
+            func()
+
+    # views into the planet state, e.g. for plotting without copies
+    @property
+    def px(self):
+        return self.planets.px
+
+    @property
+    def py(self):
+        return self.planets.py
+
+    @property
+    def vx(self):
+        return self.planets.vx
+
+    @property
+    def vy(self):
+        return self.planets.vy
+
+    def setIntegrator(self, name):
+        """Switch to one of the integrators in physics.INTEGRATORS, e.g. 'leapfrog' or 'rk4'"""
+        self._modify(partial(self.planets.setIntegrator, INTEGRATORS[name]()))
+
+    def setAdaptive(self, adaptive=True, eta=0.05):
+        """Split steps into substeps when planets get fast, see physics.AdaptiveStep"""
+        self._modify(partial(self.planets.setAdaptive, AdaptiveStep(eta) if adaptive else None))
+
     def reverseTime(self):
-        self.vx *= -1
-        self.vy *= -1
+        self._modify(self.planets.reverse)
 
     def step(self, dt):
         """Elapse time by dt and update all positions and velocities
         """
-        if len(self.px):
-            self.px += self.vx * dt
-            self.py += self.vy * dt
-
-            for star in self.stars:
-                r = np.sqrt(np.power(self.px - star.x, 2) + np.power(self.py - star.y, 2))
-                r_hooke = np.power(r, self.controlModel.k_pow - 1)
-                k = self.controlModel.k
-
-                ax = (star.x - self.px) * r_hooke * k
-                ay = (star.y - self.py) * r_hooke * k
-
-                self.vx += ax * dt
-                self.vy += ay * dt
+        if len(self.planets):
+            # read the star coordinates straight out of the table's columns, all stars are done in one pass
+            self.planets.step(dt, self.stars.column('x'), self.stars.column('y'),
+                              self.controlModel.k, self.controlModel.k_pow, self.starGeneration)
 
 
 if __name__ == '__main__':
+    import qdarkstyle   # only needed for the gui, so the engine can be imported without it (e.g. by benchmarks)
 
     app = QApplication([])
     app.setStyle('Fusion')
@@ -88,12 +142,13 @@ if __name__ == '__main__':
     gui = MainGui(engine, controlModel)
     gui.show()
 
-    def step():
-        engine.step(0.005)       # time step of 0.005 seems good for current params
-        gui.updatePlanets()
+    # the physics runs on its own thread at a fixed rate (time step of 0.005 seems good for current params),
+    # the gui just draws the newest finished frame at about 60 fps
+    engine.startBackground(dt=0.005, framesPerSecond=62.5, substeps=2)
+    app.aboutToQuit.connect(engine.stopBackground)
 
     timer = QTimer()
-    timer.timeout.connect(step)
+    timer.timeout.connect(gui.updatePlanets)
     timer.start(16)
 
     QApplication.instance().exec_()
@@ -1,14 +1,17 @@
-from qtpy.QtWidgets import QPushButton, QLCDNumber, QWidget, QGridLayout, QVBoxLayout, QFrame, QLabel, QSizePolicy
-from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QPushButton, QLCDNumber, QWidget, QGridLayout, QVBoxLayout, QHBoxLayout, QFrame, QLabel, \
+    QSizePolicy, QScrollBar
+from qtpy.QtCore import Qt, Signal
 from functools import partial
 from LCDNumberView import LCDNumberView
 from LogSliderWidget import LogSliderWidget
-from ExtDataWidgetMapper import ExtDataWidgetMapper
+from ExtDataWidgetMapper import ExtDataWidgetMapper, CommitPolicy
+from models import StarModel
 
 
-# a gui for a star
+# a gui for a star.  It shows one row of the engine's star table at a time and is rebound to other rows by
+# StarListWidget as the list scrolls
 class StarWidget(QFrame):
-    def __init__(self, starModel):
+    def __init__(self, stars):
         super().__init__()
         self.delete = QPushButton('DELETE')
         self.delete.setStyleSheet('color: #942019;')
@@ -16,11 +19,10 @@ class StarWidget(QFrame):
         self.x = QLCDNumber()
         self.y = QLCDNumber()
 
-        self.mapper = ExtDataWidgetMapper()
-        self.mapper.setOrientation(Qt.Vertical)
+        self.mapper = ExtDataWidgetMapper()   # the star table is a regular horizontal table model
 
         self.setupUI()
-        self.mapWidgets(starModel)
+        self.mapWidgets(stars)
 
     # noinspection PyArgumentList
     def setupUI(self):
@@ -32,15 +34,91 @@ class StarWidget(QFrame):
 
         layout.addWidget(self.delete, 0, 5)
 
-        self.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Minimum)
+        self.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Fixed)
         self.setLayout(layout)
 
-    def mapWidgets(self, starModel):
-        # first deal with the model mapping
-        self.mapper.setModel(starModel)
-        self.mapper.addMapping(self.x, type(starModel).x.section, b'value')   # QLCDLabel requires use of 'value' here
-        self.mapper.addMapping(self.y, type(starModel).y.section, b'value')
-        self.mapper.toFirst()
+    def mapWidgets(self, stars):
+        # first deal with the model mapping.  Table columns use the StarModel sections
+        self.mapper.setModel(stars)
+        self.mapper.addMapping(self.x, StarModel.x.section, b'value')   # QLCDLabel requires use of 'value' here
+        self.mapper.addMapping(self.y, StarModel.y.section, b'value')
+
+    def row(self):
+        return self.mapper.currentIndex()
+
+    def setRow(self, row):
+        if row != self.mapper.currentIndex():
+            self.mapper.setCurrentIndex(row)
+
+
+# the list of star controls.  Only the rows which fit in the visible area get a StarWidget; those widgets are
+# pooled and rebound to other rows of the star table while scrolling, so a thousand stars cost no more than ten
+class StarListWidget(QWidget):
+    sigDeleteStar = Signal(object)    # the star whose delete button was pressed
+
+    def __init__(self, stars):
+        super().__init__()
+        self.stars = stars
+        self.pool = []
+        self.scrollBar = QScrollBar(Qt.Vertical)
+        self.scrollBar.valueChanged.connect(self.refresh)
+
+        self.rowLayout = QVBoxLayout()
+        self.rowLayout.setContentsMargins(0, 0, 0, 0)
+        self.rowLayout.addStretch(1)   # keep this stretch at the end so widgets float to top of the list
+        # the first pooled row is made up front, every row is as high as it is
+        self.rowHeight = self.addRow().sizeHint().height()
+        self.pool[0].hide()
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(self.rowLayout, 1)
+        layout.addWidget(self.scrollBar)
+        self.setLayout(layout)
+        self.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Preferred)
+
+        stars.rowsInserted.connect(self.refresh)
+        stars.rowsRemoved.connect(self.refresh)
+        stars.modelReset.connect(self.refresh)
+
+    def visibleRows(self):
+        return max(1, self.height() // max(1, self.rowHeight))
+
+    def refresh(self):
+        visible = self.visibleRows()
+        self.scrollBar.setRange(0, max(0, len(self.stars) - visible))
+        self.scrollBar.setPageStep(visible)
+        self.scrollBar.setVisible(len(self.stars) > visible)
+        rows = min(visible, len(self.stars))
+        while len(self.pool) < rows:
+            self.addRow()
+
+        first = self.scrollBar.value()
+        for i, starWidget in enumerate(self.pool):
+            if i < rows:
+                starWidget.setRow(first + i)
+                starWidget.show()
+            else:
+                starWidget.hide()
+
+    def addRow(self):
+        starWidget = StarWidget(self.stars)
+        starWidget.delete.clicked.connect(partial(self.deleteClicked, starWidget))
+        self.rowLayout.insertWidget(len(self.pool), starWidget)
+        self.pool.append(starWidget)
+        return starWidget
+
+    def deleteClicked(self, starWidget):
+        row = starWidget.row()
+        if 0 <= row < len(self.stars):
+            self.sigDeleteStar.emit(self.stars[row])
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() // 120
+        self.scrollBar.setValue(self.scrollBar.value() - steps)
 
 
 # and a gui widget for the main controls.  They are linked to the controlModel and the engine
@@ -102,9 +180,10 @@ class ControlWidget(QWidget):
 
     def mapWidgets(self, controlModel, engine):
         self.mapper.setModel(controlModel)
-        self.mapper.addMapping(self.k, type(controlModel).k.section)
-        self.mapper.addMapping(self.k_pow, type(controlModel).k_pow.section)
-        self.mapper.addMapping(self.N, type(controlModel).numPlanets.section)
+        # dragging k or k_pow is fine to watch live, but the planet count only matters once the drag is over
+        self.mapper.addMapping(self.k, type(controlModel).k.section, policy=CommitPolicy.throttle(30))
+        self.mapper.addMapping(self.k_pow, type(controlModel).k_pow.section, policy=CommitPolicy.throttle(30))
+        self.mapper.addMapping(self.N, type(controlModel).numPlanets.section, policy=CommitPolicy.onRelease())
         self.mapper.toFirst()
 
         self.k_display.setModel(controlModel, type(controlModel).k.section)